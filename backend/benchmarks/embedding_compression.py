@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark compact embedding storage: recall vs memory and upsert payload size.
+
+Run from the backend directory:
+    python -m benchmarks.embedding_compression
+    python -m benchmarks.embedding_compression --texts some_document.txt   # real Ollama embeddings
+"""
+import argparse
+import json
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from utils.embedding_compression import compress_embeddings, truncate_embeddings
+
+
+def synthetic_embeddings(count: int, dimensions: int, seed: int = 0) -> np.ndarray:
+    """
+    Unit vectors whose variance decays along the dimension axis, roughly mimicking
+    Matryoshka-trained models where the leading components carry most information.
+    """
+    rng = np.random.default_rng(seed)
+    decay = np.exp(-np.arange(dimensions) / (dimensions / 4)).astype(np.float32)
+    vectors = rng.standard_normal((count, dimensions)).astype(np.float32) * decay
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def ollama_embeddings(path: str, model: str) -> np.ndarray:
+    """Embed the chunks of a real document with the local Ollama model."""
+    from utils.document_loaders import embed_texts_ollama, load_and_split
+
+    texts = [doc.page_content for doc in load_and_split(path)]
+    vectors = embed_texts_ollama(texts, model=model)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    scores = queries @ corpus.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def recall_at_k(truth: np.ndarray, found: np.ndarray) -> float:
+    hits = sum(len(set(t) & set(f)) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def upsert_payload_bytes(vectors: np.ndarray) -> int:
+    """Size of the JSON `values` arrays as they would be sent in an upsert request."""
+    return sum(len(json.dumps(row.tolist())) for row in vectors)
+
+
+def run(vectors: np.ndarray, k: int, num_queries: int, dimension_options: List[Optional[int]]) -> None:
+    rng = np.random.default_rng(1)
+    query_rows = rng.choice(len(vectors), size=min(num_queries, len(vectors)), replace=False)
+    queries = vectors[query_rows] + rng.normal(0, 0.05, (len(query_rows), vectors.shape[1])).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    truth = top_k(vectors, queries, k)
+    baseline_bytes = vectors.nbytes
+    baseline_payload = upsert_payload_bytes(vectors)
+
+    print(f"corpus={len(vectors)} dims={vectors.shape[1]} queries={len(queries)} k={k}")
+    print(f"{'dims':>6} {'dtype':>8} {'recall':>8} {'memory':>12} {'mem %':>7} {'upsert %':>9} {'ms':>8}")
+    for dimensions in dimension_options:
+        truncated_queries = truncate_embeddings(queries, dimensions)
+        payload = upsert_payload_bytes(truncate_embeddings(vectors, dimensions))
+        for dtype in ("float32", "float16", "int8"):
+            compressed = compress_embeddings(vectors, dtype=dtype, dimensions=dimensions)
+            started = time.perf_counter()
+            found = top_k(compressed.to_float32(), truncated_queries, k)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f"{compressed.dimensions:>6} {dtype:>8} {recall_at_k(truth, found):>8.3f} "
+                  f"{compressed.nbytes:>12,} {100 * compressed.nbytes / baseline_bytes:>6.1f}% "
+                  f"{100 * payload / baseline_payload:>8.1f}% {elapsed_ms:>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000, help="Synthetic corpus size")
+    parser.add_argument("--dimensions", type=int, default=1024, help="Synthetic embedding size")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--truncate", type=int, nargs="*", default=[0, 512, 256, 128],
+                        help="Truncation sizes to test (0 = full size)")
+    parser.add_argument("--texts", help="Embed this document with Ollama instead of using synthetic vectors")
+    parser.add_argument("--model", default="mxbai-embed-large")
+    args = parser.parse_args()
+
+    if args.texts:
+        vectors = ollama_embeddings(args.texts, args.model)
+    else:
+        vectors = synthetic_embeddings(args.count, args.dimensions)
+
+    run(vectors, k=args.k, num_queries=args.queries,
+        dimension_options=[d or None for d in args.truncate])
+
+
+if __name__ == "__main__":
+    main()
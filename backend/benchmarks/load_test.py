@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+HTTP load test for the API, driven in-process with stand-ins for RabbitMQ,
+Ollama and the vector index.
+
+Reports throughput, p50/p95/p99 latency and event-loop blocking time per endpoint.
+Blocking time is the wall time of event-loop callbacks run on behalf of an endpoint:
+synchronous work inside an async handler (file I/O, broker calls, database queries)
+shows up there, while awaiting does not.
+
+Run from the backend directory:
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --concurrency 64 --requests 5000 --mix upload=1,list=4,status=3,chat=2
+    python -m benchmarks.load_test --process --embed-latency 0.01   # also run uploads through the consumer
+"""
+import argparse
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import types
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# Endpoint label of the request a piece of event-loop work belongs to
+current_endpoint: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_endpoint", default=None)
+
+
+class LoopBlockingMonitor:
+    """Attribute the duration of every event-loop callback to the endpoint in its context"""
+
+    def __init__(self):
+        self.blocking: Dict[str, List[float]] = defaultdict(list)
+        self._original_run = None
+
+    def install(self):
+        monitor = self
+        original_run = asyncio.events.Handle._run
+        self._original_run = original_run
+
+        def timed_run(handle):
+            started = time.perf_counter()
+            try:
+                return original_run(handle)
+            finally:
+                context = getattr(handle, "_context", None)
+                label = context.get(current_endpoint) if context is not None else None
+                if label:
+                    monitor.blocking[label].append(time.perf_counter() - started)
+
+        asyncio.events.Handle._run = timed_run
+
+    def uninstall(self):
+        if self._original_run:
+            asyncio.events.Handle._run = self._original_run
+
+
+class StandInChannel:
+    """Subset of a pika BlockingChannel backed by an in-memory queue"""
+
+    def __init__(self, broker: "StandInBroker"):
+        self.broker = broker
+        self.is_open = True
+        self.is_closed = False
+        self._transaction: Optional[list] = None
+
+    def queue_declare(self, queue, durable=False, arguments=None, passive=False):
+        with self.broker.lock:
+            depth = len(self.broker.queues[queue])
+        method = types.SimpleNamespace(message_count=depth, consumer_count=self.broker.consumers)
+        return types.SimpleNamespace(method=method)
+
+    def basic_publish(self, exchange, routing_key, body, properties=None):
+        if self._transaction is not None:
+            self._transaction.append((routing_key, body))
+        else:
+            self.broker.publish(routing_key, body)
+
+    def tx_select(self):
+        self._transaction = []
+
+    def tx_commit(self):
+        for routing_key, body in self._transaction:
+            self.broker.publish(routing_key, body)
+        self._transaction = []
+
+    def tx_rollback(self):
+        self._transaction = []
+
+    def basic_ack(self, delivery_tag):
+        pass
+
+    def basic_nack(self, delivery_tag, requeue=False):
+        pass
+
+
+class StandInConnection:
+    def __init__(self, broker: "StandInBroker"):
+        self.broker = broker
+        self.is_closed = False
+
+    def channel(self):
+        return StandInChannel(self.broker)
+
+    def close(self):
+        self.is_closed = True
+
+
+class StandInBroker:
+    """
+    In-memory broker. A background thread drains the processing queue at
+    `consume_rate` messages per second, optionally running each message through
+    the real FileProcessor.
+    """
+
+    RATE_WINDOW = 5.0
+
+    def __init__(self, queue_name: str, consume_rate: float, process: bool):
+        self.queue_name = queue_name
+        self.queues: Dict[str, deque] = defaultdict(deque)
+        self.lock = threading.Lock()
+        self.consume_rate = consume_rate
+        self.process = process
+        self.consumers = 1 if consume_rate > 0 else 0
+        self.consumed = 0
+        self.acked_at: deque = deque()  # Ack times within the last RATE_WINDOW seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._consume, daemon=True)
+
+    def ack_rate(self) -> float:
+        """Acks per second over the last RATE_WINDOW seconds, like the management API"""
+        cutoff = time.monotonic() - self.RATE_WINDOW
+        while self.acked_at and self.acked_at[0] < cutoff:
+            self.acked_at.popleft()
+        return len(self.acked_at) / self.RATE_WINDOW
+
+    def publish(self, routing_key: str, body: str):
+        with self.lock:
+            self.queues[routing_key].append(body)
+
+    def start(self):
+        if self.consume_rate > 0:
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _consume(self):
+        from services.file_processor import file_processor
+
+        channel = StandInChannel(self)
+        interval = 1.0 / self.consume_rate
+        while not self._stop.is_set():
+            with self.lock:
+                body = self.queues[self.queue_name].popleft() if self.queues[self.queue_name] else None
+            if body is None:
+                time.sleep(interval)
+                continue
+            started = time.perf_counter()
+            if self.process:
+                method = types.SimpleNamespace(delivery_tag=self.consumed)
+                file_processor.process_file_message(channel, method, None, body)
+            self.consumed += 1
+            self.acked_at.append(time.monotonic())
+            time.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+class StandInIndex:
+    """Vector index stand-in recording upserts"""
+
+    def __init__(self):
+        self.vectors: Dict[str, list] = {}
+        self._name = "load-test"
+
+    def upsert(self, vectors, namespace=None):
+        for item in vectors:
+            self.vectors[item["id"]] = item["values"]
+
+    def fetch(self, ids, namespace=None):
+        return {"vectors": {vector_id: self.vectors[vector_id] for vector_id in ids if vector_id in self.vectors}}
+
+    def describe_index_stats(self):
+        return {"total_vector_count": len(self.vectors)}
+
+
+def install_stand_ins(broker: StandInBroker, embed_latency: float, dimensions: int):
+    """Point the queue service, Ollama and Pinecone at in-process stand-ins"""
+    from services.queue_service import queue_service
+    from services.admission_service import admission_service
+    import utils.document_loaders as document_loaders
+
+    def connect():
+        queue_service.connection = StandInConnection(broker)
+        queue_service.channel = queue_service.connection.channel()
+        queue_service.batch_channel = None
+
+    queue_service.connect = connect
+    queue_service.get_ack_rate = broker.ack_rate
+
+    # The admission sampler has a connection of its own
+    def connect_sampler():
+        admission_service.queue.connection = StandInConnection(broker)
+        admission_service.queue.channel = admission_service.queue.connection.channel()
+
+    admission_service.queue.connect = connect_sampler
+    admission_service.queue.get_ack_rate = broker.ack_rate
+
+    def embed(model, input, keep_alive=None):
+        if embed_latency:
+            time.sleep(embed_latency)
+        vectors = []
+        for text in input:
+            seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:4], "big")
+            vectors.append(np.random.default_rng(seed).standard_normal(dimensions).tolist())
+        return {"embeddings": vectors}
+
+    sys.modules["ollama"] = types.SimpleNamespace(embed=embed)
+    document_loaders._pinecone_indexes[os.environ["PINECONE_INDEX_NAME"]] = StandInIndex()
+
+
+def build_csv(rows: int, seed: int) -> bytes:
+    rng = random.Random(seed)
+    lines = ["id,customer,region,amount,notes"]
+    for row in range(rows):
+        lines.append(f"{row},customer-{rng.randint(1, 10_000)},{rng.choice(['emea', 'apac', 'amer'])},"
+                     f"{rng.uniform(1, 5000):.2f},order {seed}-{row} shipped")
+    return "\n".join(lines).encode("utf-8")
+
+
+async def run_load(app, args, monitor: LoopBlockingMonitor):
+    import httpx
+
+    weights = {}
+    for part in args.mix.split(","):
+        name, weight = part.split("=")
+        weights[name.strip()] = float(weight)
+    operations = list(weights)
+    operation_weights = [weights[name] for name in operations]
+
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    status_codes: Dict[str, Dict[int, int]] = defaultdict(lambda: defaultdict(int))
+    file_ids: List[str] = []
+    remaining = [args.requests]
+
+    async def request(client, label, method, url, **kwargs):
+        async def call():
+            current_endpoint.set(label)
+            return await client.request(method, url, **kwargs)
+
+        started = time.perf_counter()
+        # Run in a copied context so the endpoint label only covers this request
+        response = await asyncio.create_task(call(), context=contextvars.copy_context())
+        latencies[label].append(time.perf_counter() - started)
+        status_codes[label][response.status_code] += 1
+        if response.status_code >= 400:
+            errors[label] += 1
+        return response
+
+    async def worker(worker_id: int, client):
+        rng = random.Random(worker_id)
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            operation = rng.choices(operations, operation_weights)[0]
+            if operation == "upload":
+                payload = build_csv(args.upload_rows, rng.randint(0, 1 << 30))
+                response = await request(client, "POST /files/upload", "POST", "/api/v1/files/upload",
+                                         files={"file": ("orders.csv", payload, "text/csv")})
+                if response.status_code == 200:
+                    file_ids.append(response.json()["file"]["id"])
+            elif operation == "batch":
+                files = [("files", (f"orders-{i}.csv", build_csv(args.upload_rows, rng.randint(0, 1 << 30)), "text/csv"))
+                         for i in range(args.batch_size)]
+                response = await request(client, "POST /files/upload/batch", "POST", "/api/v1/files/upload/batch",
+                                         files=files)
+                if response.status_code == 200:
+                    file_ids.extend(f["id"] for f in response.json()["files"])
+            elif operation == "list":
+                await request(client, "GET /files", "GET", "/api/v1/files")
+            elif operation == "status":
+                if file_ids and rng.random() < 0.8:
+                    await request(client, "GET /files/{id}/status", "GET",
+                                  f"/api/v1/files/{rng.choice(file_ids)}/status")
+                else:
+                    await request(client, "GET /files/status/all", "GET", "/api/v1/files/status/all")
+            elif operation == "queue":
+                await request(client, "GET /files/queue", "GET", "/api/v1/files/queue")
+            elif operation == "chat":
+                await request(client, "POST /chat/message", "POST", "/api/v1/chat/message",
+                              json={"content": rng.choice(["hello", "which files do I have?", "summarize"])})
+            else:
+                raise ValueError(f"Unknown operation in --mix: {operation}")
+
+    # Overall event-loop lag, sampled independently of requests
+    lag_samples: List[float] = []
+    stop = asyncio.Event()
+
+    async def lag_probe():
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag_samples.append(time.perf_counter() - started - 0.005)
+
+    from services.admission_service import admission_service
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+        # ASGITransport does not run the app's startup events
+        sampler = asyncio.create_task(admission_service.run_sampler())
+        probe = asyncio.create_task(lag_probe())
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(i, client) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe
+        sampler.cancel()
+
+    return latencies, errors, status_codes, elapsed, lag_samples
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def report(latencies, errors, status_codes, elapsed, lag_samples, monitor: LoopBlockingMonitor, as_json: bool):
+    rows = []
+    for label in sorted(latencies):
+        values = latencies[label]
+        blocking = monitor.blocking.get(label, [])
+        rows.append({
+            "endpoint": label,
+            "requests": len(values),
+            "errors": errors[label],
+            "status_codes": dict(status_codes[label]),
+            "throughput_rps": len(values) / elapsed,
+            "p50_ms": percentile(values, 50) * 1000,
+            "p95_ms": percentile(values, 95) * 1000,
+            "p99_ms": percentile(values, 99) * 1000,
+            "blocking_per_request_ms": sum(blocking) / len(values) * 1000,
+            "blocking_max_ms": max(blocking, default=0.0) * 1000,
+        })
+    total_requests = sum(len(values) for values in latencies.values())
+    summary = {
+        "requests": total_requests,
+        "elapsed_s": elapsed,
+        "throughput_rps": total_requests / elapsed,
+        "loop_lag_p50_ms": percentile(lag_samples, 50) * 1000 if lag_samples else 0.0,
+        "loop_lag_p99_ms": percentile(lag_samples, 99) * 1000 if lag_samples else 0.0,
+        "loop_lag_max_ms": max(lag_samples, default=0.0) * 1000,
+    }
+
+    if as_json:
+        print(json.dumps({"summary": summary, "endpoints": rows}, indent=2))
+        return
+
+    print(f"{total_requests} requests in {elapsed:.2f}s ({summary['throughput_rps']:.0f} req/s), "
+          f"loop lag p50/p99/max {summary['loop_lag_p50_ms']:.2f}/{summary['loop_lag_p99_ms']:.2f}/"
+          f"{summary['loop_lag_max_ms']:.2f} ms")
+    print(f"{'endpoint':<26} {'reqs':>6} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'block/req ms':>13} {'block max ms':>13}")
+    for row in rows:
+        print(f"{row['endpoint']:<26} {row['requests']:>6} {row['errors']:>5} {row['throughput_rps']:>8.1f} "
+              f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+              f"{row['blocking_per_request_ms']:>13.3f} {row['blocking_max_ms']:>13.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests")
+    parser.add_argument("--mix", default="upload=2,list=3,status=2,chat=3",
+                        help="Operation weights; operations: upload, batch, list, status, queue, chat")
+    parser.add_argument("--upload-rows", type=int, default=200, help="Rows in each uploaded CSV")
+    parser.add_argument("--batch-size", type=int, default=10, help="Files per batch upload")
+    parser.add_argument("--consume-rate", type=float, default=200.0,
+                        help="Messages per second drained by the stand-in consumer (0 = none)")
+    parser.add_argument("--process", action="store_true",
+                        help="Run drained messages through FileProcessor with stand-in Ollama and index")
+    parser.add_argument("--embed-latency", type=float, default=0.0, help="Seconds per stand-in embedding request")
+    parser.add_argument("--dimensions", type=int, default=1024, help="Stand-in embedding size")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    # Run against a scratch directory so uploads, the catalog and stores are isolated
+    workdir = tempfile.mkdtemp(prefix="rag-load-test-")
+    os.chdir(workdir)
+    os.environ.setdefault("PINECONE_API_KEY", "load-test")
+    os.environ.setdefault("PINECONE_INDEX_NAME", "load-test")
+    os.environ["CATALOG_BACKEND"] = "sqlite"
+    os.environ["CATALOG_DB_PATH"] = os.path.join(workdir, "uploads", ".catalog.db")
+    os.environ["CHUNK_STORE_DIR"] = os.path.join(workdir, "chunk_store")
+
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    from main import app
+    from services.queue_service import queue_service
+
+    broker = StandInBroker(queue_service.queue_name, args.consume_rate, args.process)
+    install_stand_ins(broker, args.embed_latency, args.dimensions)
+    broker.start()
+
+    monitor = LoopBlockingMonitor()
+    monitor.install()
+    try:
+        results = asyncio.run(run_load(app, args, monitor))
+    finally:
+        monitor.uninstall()
+        broker.stop()
+
+    report(*results, monitor=monitor, as_json=args.json)
+    print(f"workdir: {workdir} (consumed {broker.consumed} messages)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
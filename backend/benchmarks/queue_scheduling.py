@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Simulate time-to-ready for the processing queue under a mixed upload workload,
+comparing FIFO with size-aware priorities (with and without aging).
+
+Run from the backend directory:
+    python -m benchmarks.queue_scheduling
+    python -m benchmarks.queue_scheduling --consumers 2 --rate 1.5 --aging 60
+"""
+import argparse
+import heapq
+import random
+import statistics
+from typing import Dict, List, Optional
+
+from services.queue_service import MAX_PRIORITY, FILE_TYPE_COST, compute_task_priority
+
+# (share of uploads, MIME type, min size, max size)
+WORKLOAD = [
+    (0.70, "text/plain", 1_000, 50_000),
+    (0.20, "application/vnd.openxmlformats-officedocument.wordprocessingml.document", 50_000, 1_000_000),
+    (0.10, "application/pdf", 1_000_000, 10_000_000),
+]
+
+
+def generate_jobs(count: int, rate: float, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    jobs, now = [], 0.0
+    for job_id in range(count):
+        now += rng.expovariate(rate)
+        pick, cumulative = rng.random(), 0.0
+        for share, file_type, low, high in WORKLOAD:
+            cumulative += share
+            if pick <= cumulative:
+                break
+        size = int(rng.uniform(low, high))
+        jobs.append({"id": job_id, "arrival": now, "size": size, "type": file_type,
+                     "priority": compute_task_priority(size, file_type)})
+    return jobs
+
+
+def service_time(job: Dict, bytes_per_second: float) -> float:
+    """Fixed per-job overhead plus time proportional to weighted size"""
+    return 0.2 + job["size"] * FILE_TYPE_COST.get(job["type"], 1.0) / bytes_per_second
+
+
+def simulate(jobs: List[Dict], consumers: int, policy: str,
+             aging: Optional[float], bytes_per_second: float) -> Dict[int, float]:
+    """Return {job id: time from upload to ready} for a scheduling policy"""
+    pending = sorted(jobs, key=lambda j: j["arrival"])
+    waiting: List[Dict] = []
+    free_at = [0.0] * consumers
+    heapq.heapify(free_at)
+    done: Dict[int, float] = {}
+    next_arrival = 0
+
+    while len(done) < len(jobs):
+        now = heapq.heappop(free_at)
+        if not waiting and next_arrival < len(pending):
+            now = max(now, pending[next_arrival]["arrival"])
+        while next_arrival < len(pending) and pending[next_arrival]["arrival"] <= now:
+            waiting.append(pending[next_arrival])
+            next_arrival += 1
+
+        if policy == "fifo":
+            job = min(waiting, key=lambda j: j["arrival"])
+        else:
+            # Aged jobs go first, oldest first, like the consumer draining the
+            # promoted queue before each regular task
+            def rank(j):
+                aged_at = j["arrival"] + aging if aging and j["priority"] < MAX_PRIORITY - 1 else None
+                if aged_at is not None and aged_at <= now:
+                    return (-MAX_PRIORITY, aged_at)
+                return (-j["priority"], j["arrival"])
+            job = min(waiting, key=rank)
+
+        waiting.remove(job)
+        finished = now + service_time(job, bytes_per_second)
+        done[job["id"]] = finished - job["arrival"]
+        heapq.heappush(free_at, finished)
+    return done
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--rate", type=float, default=0.65, help="Uploads per second")
+    parser.add_argument("--consumers", type=int, default=1)
+    parser.add_argument("--throughput", type=float, default=1_500_000,
+                        help="Weighted bytes a consumer processes per second")
+    parser.add_argument("--aging", type=float, default=120, help="Aging threshold in seconds")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    jobs = generate_jobs(args.jobs, args.rate, args.seed)
+    small = {j["id"] for j in jobs if j["size"] < 50_000}
+    large = {j["id"] for j in jobs if j["size"] >= 1_000_000}
+
+    print(f"jobs={len(jobs)} rate={args.rate}/s consumers={args.consumers} aging={args.aging}s")
+    print(f"{'policy':>16} {'median':>8} {'p95':>8} {'small p50':>10} {'large p50':>10} {'large max':>10}")
+    for label, policy, aging in (("fifo", "fifo", None),
+                                 ("priority", "priority", None),
+                                 ("priority+aging", "priority", args.aging)):
+        times = simulate(jobs, args.consumers, policy, aging, args.throughput)
+        all_times = list(times.values())
+        small_times = [times[i] for i in small]
+        large_times = [times[i] for i in large]
+        print(f"{label:>16} {statistics.median(all_times):>8.1f} {percentile(all_times, 95):>8.1f} "
+              f"{statistics.median(small_times):>10.1f} {statistics.median(large_times):>10.1f} "
+              f"{max(large_times):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
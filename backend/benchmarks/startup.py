@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Measure API / consumer import time in fresh interpreters, and optionally the
+latency of the first embedding request against a cold vs warm Ollama model.
+
+Run from the backend directory:
+    python -m benchmarks.startup
+    python -m benchmarks.startup --ollama
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = ("pika", "ollama", "pinecone", "langchain_community", "langchain_text_splitters")
+
+
+def import_time(module: str, runs: int) -> float:
+    """Median wall-clock seconds to start Python and import `module`"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], check=True)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def loaded_heavy_modules(module: str):
+    """Heavy dependencies that importing `module` pulls in eagerly"""
+    probe = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    output = subprocess.run([sys.executable, "-c", probe], check=True, capture_output=True, text=True)
+    return [name for name in output.stdout.strip().split(",") if name]
+
+
+def first_embedding_latency(model: str):
+    """Time the first embedding call after unloading the model, then a second call"""
+    import ollama
+    from utils.document_loaders import embed_texts_ollama
+
+    ollama.generate(model=model, prompt="", keep_alive=0)  # Unload the model if resident
+    started = time.perf_counter()
+    embed_texts_ollama(["first job"], model=model)
+    cold = time.perf_counter() - started
+    started = time.perf_counter()
+    embed_texts_ollama(["second job"], model=model)
+    warm = time.perf_counter() - started
+    return cold, warm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--ollama", action="store_true", help="Also measure cold vs warm embedding latency")
+    parser.add_argument("--model", default="mxbai-embed-large")
+    args = parser.parse_args()
+
+    baseline = import_time("sys", args.runs)
+    print(f"interpreter startup: {baseline * 1000:.0f} ms")
+    for module in ("main", "consumer"):
+        elapsed = import_time(module, args.runs)
+        heavy = loaded_heavy_modules(module)
+        print(f"import {module:<9} {(elapsed - baseline) * 1000:>7.0f} ms  "
+              f"eager heavy modules: {', '.join(heavy) or 'none'}")
+
+    if args.ollama:
+        cold, warm = first_embedding_latency(args.model)
+        print(f"first embedding (cold model): {cold * 1000:.0f} ms, after warm-up: {warm * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,17 @@ RabbitMQ Consumer for file processing
 Run this script to start consuming file processing tasks
 """
 import os
+import time
 import logging
 from dotenv import load_dotenv
-from services.queue_service import queue_service
-from services.file_processor import file_processor
 
 # Load environment variables
 load_dotenv()
 
+from services.queue_service import queue_service
+from services.file_processor import file_processor
+from utils.document_loaders import warm_up
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -20,17 +23,47 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Created once the consumer is warm and consuming; used by the container health check
+READY_FILE = os.getenv("CONSUMER_READY_FILE", "/tmp/consumer.ready")
+WARMUP_ATTEMPTS = int(os.getenv("CONSUMER_WARMUP_ATTEMPTS", "5"))
+
+def warm_up_with_retry():
+    """Warm up the embedding model and index client, retrying while dependencies start"""
+    for attempt in range(1, WARMUP_ATTEMPTS + 1):
+        try:
+            return warm_up()
+        except Exception as e:
+            if attempt == WARMUP_ATTEMPTS:
+                raise
+            delay = min(2 ** attempt, 30)
+            logger.warning(f"Warm-up attempt {attempt} failed ({e}), retrying in {delay}s")
+            time.sleep(delay)
+
+def mark_ready():
+    with open(READY_FILE, "w") as ready_file:
+        ready_file.write(str(os.getpid()))
+    logger.info("Consumer is warm and ready")
+
+def clear_ready():
+    if os.path.exists(READY_FILE):
+        os.remove(READY_FILE)
+
 def main():
     """Start the file processing consumer"""
     logger.info("Starting file processing consumer...")
+    clear_ready()
     
     try:
+        # Load the model and build clients before taking any work
+        warm_up_with_retry()
+        
         # Connect to RabbitMQ
         queue_service.connect()
         
         # Start consuming messages
         queue_service.consume_file_processing_tasks(
-            callback=file_processor.process_file_message
+            callback=file_processor.process_file_message,
+            on_ready=mark_ready
         )
         
     except KeyboardInterrupt:
@@ -38,8 +71,8 @@ def main():
     except Exception as e:
         logger.error(f"Consumer error: {e}")
     finally:
+        clear_ready()
         queue_service.disconnect()
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Offline bulk ingester
+Walks a directory tree and indexes every supported file with a pool of workers,
+bypassing the HTTP upload path and the queue.
+
+Progress is recorded in a SQLite manifest (path, mtime, size, hash, status), so a
+rerun skips files that were already indexed and resumes interrupted ones:
+
+    python ingest.py /data/corpus --workers 8
+"""
+import os
+import time
+import sqlite3
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from typing import Dict, Iterator, Optional, Tuple
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from utils.document_loaders import process_and_index, warm_up, STRUCTURED_EXTENSIONS, UpsertBatcher
+from utils.file_hash import hash_file
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = (".pdf", ".docx", ".txt") + STRUCTURED_EXTENSIONS
+
+class IngestManifest:
+    """SQLite record of every file seen by the bulk ingester"""
+
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                mtime REAL NOT NULL,
+                size INTEGER NOT NULL,
+                hash TEXT,
+                status TEXT NOT NULL,
+                chunks INTEGER,
+                error TEXT,
+                updated_at TEXT NOT NULL
+            )
+            """
+        )
+        self.connection.commit()
+
+    def get(self, path: str) -> Optional[Dict]:
+        row = self.connection.execute(
+            "SELECT path, mtime, size, hash, status, chunks, error FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("path", "mtime", "size", "hash", "status", "chunks", "error"), row))
+
+    def record(self, path: str, mtime: float, size: int, status: str, file_hash: str = None,
+               chunks: int = None, error: str = None) -> None:
+        self.connection.execute(
+            """
+            INSERT INTO files (path, mtime, size, hash, status, chunks, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(path) DO UPDATE SET
+                mtime = excluded.mtime, size = excluded.size,
+                hash = COALESCE(excluded.hash, files.hash), status = excluded.status,
+                chunks = COALESCE(excluded.chunks, files.chunks), error = excluded.error, updated_at = excluded.updated_at
+            """,
+            (path, mtime, size, file_hash, status, chunks, error, datetime.now().isoformat())
+        )
+        self.connection.commit()
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.connection.execute("SELECT status, COUNT(*) FROM files GROUP BY status").fetchall())
+
+    def close(self):
+        self.connection.close()
+
+def walk_files(root: str, extensions: Tuple[str, ...]) -> Iterator[str]:
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(extensions):
+                yield os.path.abspath(os.path.join(directory, filename))
+
+def ingest_file(path: str, known_hash: Optional[str], options: Dict) -> Tuple[str, str, int]:
+    """
+    Index one file (runs in a worker thread)
+
+    Returns:
+        (status, hash, num_vectors); status is "unchanged" if the content hash
+        matches an earlier completed run
+    """
+    file_hash = hash_file(path)
+    if known_hash and file_hash == known_hash:
+        return "unchanged", file_hash, 0
+    num_vectors, _ = process_and_index(path, **options)
+    return "completed", file_hash, num_vectors
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk index a directory tree into Pinecone")
+    parser.add_argument("root", help="Directory to ingest")
+    parser.add_argument("--workers", type=int, default=4, help="Number of files processed in parallel")
+    parser.add_argument("--manifest", default="ingest_manifest.db", help="Path of the progress manifest")
+    parser.add_argument("--index", dest="index_name", default=None, help="Pinecone index (default: PINECONE_INDEX_NAME)")
+    parser.add_argument("--namespace", default=None)
+    parser.add_argument("--chunk-size", type=int, default=800)
+    parser.add_argument("--chunk-overlap", type=int, default=120)
+    parser.add_argument("--model", default="mxbai-embed-large")
+    parser.add_argument("--skip-failed", action="store_true", help="Do not retry files that failed in an earlier run")
+    args = parser.parse_args()
+
+    options = {
+        "index_name": args.index_name,
+        "namespace": args.namespace,
+        "chunk_size": args.chunk_size,
+        "chunk_overlap": args.chunk_overlap,
+        "model": args.model,
+        # Small files from different workers share upsert requests
+        "batcher": UpsertBatcher()
+    }
+
+    manifest = IngestManifest(args.manifest)
+    warm_up(index_name=args.index_name, model=args.model)
+
+    started = time.perf_counter()
+    skipped = submitted = 0
+    finished = {"completed": 0, "unchanged": 0, "failed": 0}
+    vectors = 0
+
+    executor = ThreadPoolExecutor(max_workers=args.workers)
+    try:
+        futures = {}
+        for path in walk_files(args.root, SUPPORTED_EXTENSIONS):
+            stat = os.stat(path)
+            previous = manifest.get(path)
+            known_hash = None
+            if previous:
+                unchanged_stat = previous["mtime"] == stat.st_mtime and previous["size"] == stat.st_size
+                if previous["status"] == "completed":
+                    if unchanged_stat:
+                        skipped += 1
+                        continue
+                    known_hash = previous["hash"]
+                elif previous["status"] == "failed" and args.skip_failed and unchanged_stat:
+                    skipped += 1
+                    continue
+
+            # Files left in "processing" by an interrupted run are simply redone;
+            # vector ids are content hashes so re-upserting is idempotent
+            manifest.record(path, stat.st_mtime, stat.st_size, "processing")
+            futures[executor.submit(ingest_file, path, known_hash, options)] = (path, stat)
+            submitted += 1
+
+        logger.info(f"Submitted {submitted} file(s), skipped {skipped} already indexed")
+
+        for done, future in enumerate(as_completed(futures), start=1):
+            path, stat = futures[future]
+            try:
+                status, file_hash, num_vectors = future.result()
+                manifest.record(path, stat.st_mtime, stat.st_size, "completed", file_hash=file_hash,
+                                chunks=num_vectors if status == "completed" else None)
+                finished[status] += 1
+                vectors += num_vectors
+            except Exception as e:
+                logger.error(f"Failed to ingest {path}: {e}")
+                manifest.record(path, stat.st_mtime, stat.st_size, "failed", error=str(e))
+                finished["failed"] += 1
+
+            if done % 50 == 0 or done == submitted:
+                rate = done / (time.perf_counter() - started)
+                logger.info(f"Progress: {done}/{submitted} files ({rate:.1f} files/s, {vectors} vectors)")
+
+    except KeyboardInterrupt:
+        logger.info("Ingest interrupted; rerun the same command to resume")
+    finally:
+        # Queued files stay "processing" in the manifest and are redone on the next run
+        executor.shutdown(wait=True, cancel_futures=True)
+        logger.info(
+            f"Done: {finished['completed']} indexed, {finished['unchanged']} unchanged, "
+            f"{finished['failed']} failed, {skipped} skipped. Manifest: {manifest.counts()}"
+        )
+        manifest.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,9 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from routes.files import router as files_router
 from routes.chat import router as chat_router
+from services.admission_service import admission_service
 from dotenv import load_dotenv
 import os
 
@@ -29,6 +31,15 @@ app.add_middleware(
 app.include_router(files_router)
 app.include_router(chat_router)
 
+@app.on_event("startup")
+async def start_admission_sampler():
+    """Sample the processing queue in the background for admission control"""
+    app.state.admission_sampler = asyncio.create_task(admission_service.run_sampler())
+
+@app.on_event("shutdown")
+async def stop_admission_sampler():
+    app.state.admission_sampler.cancel()
+
 @app.get("/")
 def read_root():
     return {"message": "RAG Model API is running!"}
@@ -83,8 +83,9 @@ def generate_ai_response(user_message: str) -> str:
     lower_message = user_message.lower()
     
     # Import here to avoid circular imports
-    from .files import uploaded_files_db
-    files_count = len(uploaded_files_db)
+    from services.file_catalog import file_catalog
+    uploaded_files = file_catalog.list()
+    files_count = len(uploaded_files)
     
     if files_count == 0:
         return "I don't see any uploaded files yet. Please upload some documents first, and then I can help you analyze them!"
@@ -93,7 +94,7 @@ def generate_ai_response(user_message: str) -> str:
         return f"Hello! I can see you have {files_count} file(s) uploaded. How can I help you analyze them?"
     
     if any(word in lower_message for word in ['file', 'document']):
-        file_names = [file_data["name"] for file_data in uploaded_files_db.values()]
+        file_names = [file_data["name"] for file_data in uploaded_files]
         file_list = ", ".join(file_names)
         return f"You have uploaded the following files: {file_list}. What would you like to know about them?"
     
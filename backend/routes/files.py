@@ -1,13 +1,15 @@
 import os
 import uuid
+import hashlib
 from datetime import datetime
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import JSONResponse
-import shutil
 import logging
 from services.queue_service import queue_service
 from services.status_service import status_service
+from services.admission_service import admission_service
+from services.file_catalog import file_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +19,7 @@ router = APIRouter(prefix="/api/v1/files", tags=["files"])
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-# In-memory storage for file metadata (in production, use a database)
-uploaded_files_db = {}
+# File metadata lives in the persistent catalog (services/file_catalog.py)
 
 # File type validation
 ALLOWED_TYPES = [
@@ -28,9 +29,12 @@ ALLOWED_TYPES = [
     'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
     'text/csv',
     'application/json',
+    'application/x-ndjson',
 ]
 
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_BATCH_FILES = 500  # Further capped by admission_service.max_batch_size
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # Bytes read per write when streaming uploads to disk
 
 def validate_file(file: UploadFile):
     """Validate uploaded file"""
@@ -43,12 +47,73 @@ def validate_file(file: UploadFile):
     # Note: file.size might not be available in all cases
     # For production, you might want to check size during upload
 
+def save_upload(file: UploadFile, file_path: str) -> Tuple[int, str]:
+    """
+    Stream an upload to disk in chunks, aborting as soon as it exceeds MAX_FILE_SIZE
+
+    Returns:
+        (int, str): Number of bytes written and SHA-256 of the content
+    """
+    file_size = 0
+    digest = hashlib.sha256()
+    with open(file_path, "wb") as buffer:
+        while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+            file_size += len(chunk)
+            if file_size > MAX_FILE_SIZE:
+                break
+            digest.update(chunk)
+            buffer.write(chunk)
+
+    if file_size > MAX_FILE_SIZE:
+        os.remove(file_path)  # Clean up
+        raise HTTPException(
+            status_code=400,
+            detail=f"File size exceeds {MAX_FILE_SIZE / (1024 * 1024)}MB limit"
+        )
+    return file_size, digest.hexdigest()
+
+def latest_status(file_data: Dict[str, Any], status_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Current status of a cataloged file. The catalog is written by every API worker and
+    consumer, so it wins unless this worker's own status entry is more recent.
+    """
+    catalog_updated_at = file_data.get("updatedAt")
+    if status_info and (not catalog_updated_at or
+                        datetime.fromisoformat(status_info["updated_at"]) > datetime.fromisoformat(catalog_updated_at)):
+        return {
+            "file_id": file_data["id"],
+            "status": status_info["status"],
+            "progress": status_info["progress"],
+            "message": status_info.get("message") or "",
+            "error": status_info.get("error"),
+            "updated_at": status_info["updated_at"]
+        }
+    return {
+        "file_id": file_data["id"],
+        "status": file_data["status"],
+        "progress": file_data["progress"],
+        "message": file_data.get("message") or "",
+        "error": file_data.get("error"),
+        "updated_at": catalog_updated_at
+    }
+
+def check_ingest_admission(count: int = 1):
+    """Reject new uploads with 429 while the processing backlog is over its limits"""
+    retry_after = admission_service.check_admission(count)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Processing queue is full, retry in {retry_after} seconds",
+            headers={"Retry-After": str(retry_after)}
+        )
+
 @router.post("/upload")
 async def upload_file(file: UploadFile = File(...)):
     """Upload a file to the server"""
     try:
         # Validate file
         validate_file(file)
+        check_ingest_admission()
         
         # Generate unique file ID and filename
         file_id = str(uuid.uuid4())
@@ -57,19 +122,7 @@ async def upload_file(file: UploadFile = File(...)):
         file_path = os.path.join(UPLOAD_DIR, unique_filename)
         
         # Save file to disk
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get file size after saving
-        file_size = os.path.getsize(file_path)
-        
-        # Check file size after upload
-        if file_size > MAX_FILE_SIZE:
-            os.remove(file_path)  # Clean up
-            raise HTTPException(
-                status_code=400,
-                detail=f"File size exceeds {MAX_FILE_SIZE / (1024 * 1024)}MB limit"
-            )
+        file_size, file_hash = save_upload(file, file_path)
         
         # Store file metadata
         file_metadata = {
@@ -80,10 +133,11 @@ async def upload_file(file: UploadFile = File(...)):
             "uploadedAt": datetime.now().isoformat(),
             "status": "uploaded",
             "progress": 0,
-            "path": file_path
+            "path": file_path,
+            "hash": file_hash
         }
         
-        uploaded_files_db[file_id] = file_metadata
+        file_catalog.add(file_metadata)
         
         # Initialize status tracking
         status_service.update_file_status(
@@ -93,7 +147,15 @@ async def upload_file(file: UploadFile = File(...)):
             message="File uploaded successfully"
         )
         
-        # Enqueue file for processing
+        # Enqueue file for processing. "queued" is recorded before the task is published
+        # so it cannot overwrite the status of a consumer that already picked it up
+        status_service.update_file_status(
+            file_id=file_id,
+            status="queued",
+            progress=5,
+            message="File queued for processing"
+        )
+        file_catalog.update_status([file_id], "queued", 5, "File queued for processing")
         try:
             queue_data = {
                 "file_id": file_id,
@@ -105,12 +167,6 @@ async def upload_file(file: UploadFile = File(...)):
             
             success = queue_service.publish_file_processing_task(queue_data)
             if success:
-                status_service.update_file_status(
-                    file_id=file_id,
-                    status="queued",
-                    progress=5,
-                    message="File queued for processing"
-                )
                 logger.info(f"File {file.filename} queued for processing")
             else:
                 status_service.update_file_status(
@@ -132,6 +188,10 @@ async def upload_file(file: UploadFile = File(...)):
                 error=str(e)
             )
         
+        status_info = status_service.get_file_status(file_id)
+        if status_info["status"] == "failed":
+            file_catalog.update_status([file_id], "failed", 0, status_info["message"], status_info["error"])
+        
         return JSONResponse(
             status_code=200,
             content={
@@ -153,15 +213,144 @@ async def upload_file(file: UploadFile = File(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+@router.post("/upload/batch")
+async def upload_files(files: List[UploadFile] = File(...)):
+    """Upload several files and enqueue them for processing in one batch"""
+    # Larger batches could never pass admission control, so reject them outright
+    max_files = min(MAX_BATCH_FILES, admission_service.max_batch_size)
+    if len(files) > max_files:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many files in one request (maximum {max_files})"
+        )
+    
+    # Validate every part before writing anything to disk
+    errors = []
+    valid_files = []
+    for file in files:
+        try:
+            validate_file(file)
+            valid_files.append(file)
+        except HTTPException as e:
+            errors.append({"name": file.filename, "error": e.detail})
+    
+    if not valid_files:
+        raise HTTPException(status_code=400, detail={"message": "No valid files in upload", "errors": errors})
+    
+    check_ingest_admission(len(valid_files))
+    
+    # Stream each part to disk
+    saved = []
+    for file in valid_files:
+        file_id = str(uuid.uuid4())
+        file_path = os.path.join(UPLOAD_DIR, f"{file_id}{os.path.splitext(file.filename)[1]}")
+        try:
+            file_size, file_hash = save_upload(file, file_path)
+        except HTTPException as e:
+            errors.append({"name": file.filename, "error": e.detail})
+            continue
+        except Exception as e:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            errors.append({"name": file.filename, "error": f"Upload failed: {str(e)}"})
+            continue
+        saved.append({
+            "id": file_id,
+            "name": file.filename,
+            "size": file_size,
+            "type": file.content_type,
+            "uploadedAt": datetime.now().isoformat(),
+            "status": "uploaded",
+            "progress": 0,
+            "path": file_path,
+            "hash": file_hash
+        })
+    
+    if not saved:
+        raise HTTPException(status_code=400, detail={"message": "No files could be saved", "errors": errors})
+    
+    # Register all catalog entries and statuses in one batch
+    try:
+        file_catalog.add_many(saved)
+    except Exception as e:
+        # Don't leave unregistered files behind for reconcile to pick up as orphans
+        for file_metadata in saved:
+            if os.path.exists(file_metadata["path"]):
+                os.remove(file_metadata["path"])
+        logger.error(f"Failed to register batch of {len(saved)} files: {e}")
+        raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
+    file_ids = [file_metadata["id"] for file_metadata in saved]
+    status_service.update_file_statuses(
+        file_ids,
+        status="uploaded",
+        progress=0,
+        message="File uploaded successfully"
+    )
+    
+    # Enqueue every file with a single batched publish, marked "queued" beforehand
+    # (see upload_file)
+    status_service.update_file_statuses(
+        file_ids,
+        status="queued",
+        progress=5,
+        message="File queued for processing"
+    )
+    file_catalog.update_status(file_ids, "queued", 5, "File queued for processing")
+    queue_data = [
+        {
+            "file_id": file_metadata["id"],
+            "file_path": file_metadata["path"],
+            "file_name": file_metadata["name"],
+            "file_type": file_metadata["type"],
+            "file_size": file_metadata["size"]
+        }
+        for file_metadata in saved
+    ]
+    queued = queue_service.publish_file_processing_tasks(queue_data)
+    if queued:
+        logger.info(f"Queued {len(saved)} files for processing")
+    else:
+        status_service.update_file_statuses(
+            file_ids,
+            status="failed",
+            progress=0,
+            message="Failed to queue file for processing",
+            error="Queue service unavailable"
+        )
+        logger.error(f"Failed to queue batch of {len(saved)} files for processing")
+        file_catalog.update_status(file_ids, "failed", 0, "Failed to queue file for processing",
+                                   "Queue service unavailable")
+    
+    return JSONResponse(
+        status_code=200,
+        content={
+            "message": f"Uploaded {len(saved)} of {len(files)} files",
+            "uploaded": len(saved),
+            "failed": len(errors),
+            "queued": queued,
+            "files": [
+                {
+                    "id": file_metadata["id"],
+                    "name": file_metadata["name"],
+                    "size": file_metadata["size"],
+                    "type": file_metadata["type"],
+                    "uploadedAt": file_metadata["uploadedAt"],
+                    "status": file_metadata["status"],
+                    "progress": file_metadata["progress"]
+                }
+                for file_metadata in saved
+            ],
+            "errors": errors
+        }
+    )
+
 @router.get("")
 async def get_files():
     """Get list of uploaded files with current processing status"""
     files = []
-    for file_data in uploaded_files_db.values():
-        file_id = file_data["id"]
-        
-        # Get current status from status service
-        status_info = status_service.get_file_status(file_id)
+    for file_data in file_catalog.list():
+        # The shared catalog copy, unless this worker has a newer status
+        status_info = latest_status(file_data, status_service.get_file_status(file_data["id"]))
         
         file_info = {
             "id": file_data["id"],
@@ -169,31 +358,38 @@ async def get_files():
             "size": file_data["size"],
             "type": file_data["type"],
             "uploadedAt": file_data["uploadedAt"],
-            "status": status_info.get("status", "unknown") if status_info else "unknown",
-            "progress": status_info.get("progress", 0) if status_info else 0,
-            "message": status_info.get("message", "") if status_info else "",
-            "error": status_info.get("error") if status_info else None
+            "status": status_info["status"],
+            "progress": status_info["progress"],
+            "message": status_info["message"],
+            "error": status_info["error"]
         }
         files.append(file_info)
     
     return {"files": files}
 
+@router.get("/queue")
+async def get_queue_backlog():
+    """Get the current processing backlog and admission limits"""
+    return admission_service.get_backlog()
+
 @router.delete("/{file_id}")
 async def delete_file(file_id: str):
     """Delete an uploaded file"""
-    if file_id not in uploaded_files_db:
+    file_data = file_catalog.get(file_id)
+    if file_data is None:
         raise HTTPException(status_code=404, detail="File not found")
     
     try:
-        # Get file metadata
-        file_data = uploaded_files_db[file_id]
         
         # Delete file from disk
         if os.path.exists(file_data["path"]):
             os.remove(file_data["path"])
+        completion_marker = f"{file_data['path']}.done"
+        if os.path.exists(completion_marker):
+            os.remove(completion_marker)
         
         # Remove from database
-        del uploaded_files_db[file_id]
+        file_catalog.delete(file_id)
         
         # Remove from status tracking
         status_service.delete_file_status(file_id)
@@ -206,26 +402,20 @@ async def delete_file(file_id: str):
 @router.get("/{file_id}/status")
 async def get_file_status(file_id: str):
     """Get the current processing status of a specific file"""
-    if file_id not in uploaded_files_db:
+    file_data = file_catalog.get(file_id)
+    if file_data is None:
         raise HTTPException(status_code=404, detail="File not found")
     
-    status_info = status_service.get_file_status(file_id)
-    if not status_info:
-        raise HTTPException(status_code=404, detail="Status not found for file")
-    
-    return {
-        "file_id": file_id,
-        "status": status_info["status"],
-        "progress": status_info["progress"],
-        "message": status_info["message"],
-        "error": status_info.get("error"),
-        "updated_at": status_info["updated_at"]
-    }
+    return latest_status(file_data, status_service.get_file_status(file_id))
 
 @router.get("/status/all")
 async def get_all_file_statuses():
     """Get processing status of all files"""
-    all_statuses = status_service.get_all_file_statuses()
+    # Built from the catalog so files handled by other workers are included
+    all_statuses = {
+        file_data["id"]: latest_status(file_data, status_service.get_file_status(file_data["id"]))
+        for file_data in file_catalog.list()
+    }
     return {"statuses": all_statuses}
 
 
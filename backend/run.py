@@ -13,15 +13,25 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000))
     host = os.getenv("HOST", "0.0.0.0")
     reload = os.getenv("RELOAD", "true").lower() == "true"
+    # Multiple workers share state through the file catalog; uvicorn ignores
+    # workers when reload is enabled
+    workers = int(os.getenv("WORKERS", 1))
     
     print(f"Starting RAG Model API server on {host}:{port}")
     print(f"Reload mode: {reload}")
+    print(f"Workers: {1 if reload else workers}")
+    
+    # Reconcile the file catalog once, before any worker accepts uploads
+    from routes.files import UPLOAD_DIR
+    from services.file_catalog import file_catalog
+    file_catalog.reconcile(UPLOAD_DIR)
     
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
-        reload=reload
+        reload=reload,
+        workers=None if reload else workers
     )
 
 
@@ -0,0 +1,163 @@
+import os
+import math
+import time
+import asyncio
+import logging
+from typing import Dict, Any, Optional
+from services.queue_service import QueueService, queue_service
+
+logger = logging.getLogger(__name__)
+
+class AdmissionService:
+    """
+    Admission control for file ingest based on processing queue backlog.
+
+    The broker is sampled by a background task (`run_sampler`) in a worker thread,
+    over a connection of its own (pika connections are not thread-safe), so request
+    handlers only read the latest sample and never block the event loop.
+    """
+
+    def __init__(self):
+        self.max_queue_depth = int(os.getenv("INGEST_MAX_QUEUE_DEPTH", "100"))
+        self.max_in_flight = int(os.getenv("INGEST_MAX_IN_FLIGHT", "150"))
+        self.default_retry_after = int(os.getenv("INGEST_DEFAULT_RETRY_AFTER", "30"))
+        self.max_retry_after = int(os.getenv("INGEST_MAX_RETRY_AFTER", "600"))
+        # Interval between broker samples; a sample older than `sample_max_age` is not used
+        self.sample_ttl = float(os.getenv("INGEST_BACKLOG_SAMPLE_TTL", "1.0"))
+        self.sample_max_age = max(10 * self.sample_ttl, 5.0)
+        self.smoothing = 0.3
+        # With several API workers, publishes by the others look like queue growth, so
+        # the local depth-based estimate is only used by a single worker
+        self.single_publisher = int(os.getenv("WORKERS", "1")) <= 1
+
+        # A batch can never be admitted if it alone exceeds a limit
+        self.max_batch_size = min(self.max_queue_depth, self.max_in_flight)
+
+        self.queue = QueueService()  # Dedicated connection for the sampler thread
+        self.throughput: Optional[float] = None  # Messages consumed per second (EWMA)
+        self._last_sample: Optional[Dict[str, Any]] = None
+        self._admitted_since_sample = 0  # Jobs admitted by this process since the last sample
+
+    def refresh(self) -> Optional[Dict[str, Any]]:
+        """Take a queue depth sample and update the throughput estimate (blocking)"""
+        now = time.monotonic()
+        try:
+            depth = self.queue.get_queue_depth()
+        except Exception as e:
+            logger.warning(f"Could not read queue depth, admitting without backpressure: {e}")
+            self._last_sample = None
+            return None
+
+        sample = {
+            "at": now,
+            "message_count": depth["message_count"],
+            "consumer_count": depth["consumer_count"],
+            "published_count": queue_service.published_count
+        }
+
+        rate = self.queue.get_ack_rate()
+        previous = self._last_sample
+        if rate is None and previous and self.single_publisher:
+            elapsed = now - previous["at"]
+            # Messages that left the ready queue = old depth + new publishes - new depth
+            consumed = (previous["message_count"]
+                        + sample["published_count"] - previous["published_count"]
+                        - sample["message_count"])
+            if elapsed > 0 and consumed >= 0:
+                rate = consumed / elapsed
+
+        if rate is not None:
+            if self.throughput is None:
+                self.throughput = rate
+            elif rate > 0 or sample["message_count"] > 0:
+                # Idle periods with an empty queue say nothing about capacity
+                self.throughput = self.smoothing * rate + (1 - self.smoothing) * self.throughput
+
+        self._last_sample = sample
+        self._admitted_since_sample = 0
+        return sample
+
+    async def run_sampler(self):
+        """Refresh the backlog sample every `sample_ttl` seconds (started with the app)"""
+        while True:
+            await asyncio.to_thread(self.refresh)
+            await asyncio.sleep(self.sample_ttl)
+
+    def _current_sample(self) -> Optional[Dict[str, Any]]:
+        sample = self._last_sample
+        if sample is None or time.monotonic() - sample["at"] > self.sample_max_age:
+            return None
+        return sample
+
+    def get_backlog(self) -> Dict[str, Any]:
+        """
+        Get the current ingest backlog
+
+        Returns:
+            dict: queue depth, consumers, in-flight jobs, measured throughput and limits
+        """
+        sample = self._current_sample()
+        if sample is None:
+            return {
+                "available": False,
+                "max_queue_depth": self.max_queue_depth,
+                "max_in_flight": self.max_in_flight,
+                "max_batch_size": self.max_batch_size
+            }
+
+        # Jobs admitted since the sample was taken are not in it yet
+        queue_depth = sample["message_count"] + self._admitted_since_sample
+        # Each consumer holds at most `prefetch_count` unacknowledged messages
+        in_flight = queue_depth + sample["consumer_count"] * queue_service.prefetch_count
+        estimated_drain = None
+        if self.throughput:
+            estimated_drain = round(queue_depth / self.throughput, 1)
+
+        return {
+            "available": True,
+            "queue_depth": queue_depth,
+            "consumers": sample["consumer_count"],
+            "in_flight": in_flight,
+            "throughput_per_second": round(self.throughput, 3) if self.throughput is not None else None,
+            "estimated_drain_seconds": estimated_drain,
+            "max_queue_depth": self.max_queue_depth,
+            "max_in_flight": self.max_in_flight,
+            "max_batch_size": self.max_batch_size
+        }
+
+    def check_admission(self, count: int = 1) -> Optional[int]:
+        """
+        Decide whether `count` new ingest jobs can be accepted
+
+        Jobs are always admitted while nothing is waiting in the queue, since
+        waiting could not make room for them; callers cap `count` at max_batch_size.
+
+        Returns:
+            Optional[int]: None if admitted, otherwise the Retry-After estimate in seconds
+        """
+        backlog = self.get_backlog()
+        if not backlog["available"]:
+            return None
+
+        excess = max(
+            backlog["queue_depth"] + count - self.max_queue_depth,
+            backlog["in_flight"] + count - self.max_in_flight
+        )
+        if excess <= 0 or backlog["queue_depth"] == 0:
+            self._admitted_since_sample += count
+            return None
+
+        if backlog["consumers"] == 0 or not self.throughput:
+            retry_after = self.default_retry_after
+        else:
+            retry_after = math.ceil(excess / self.throughput)
+
+        retry_after = max(1, min(retry_after, self.max_retry_after))
+        logger.warning(
+            f"Rejecting ingest of {count} file(s): depth={backlog['queue_depth']} "
+            f"in_flight={backlog['in_flight']}, retry after {retry_after}s"
+        )
+        return retry_after
+
+# Global admission service instance
+admission_service = AdmissionService()
@@ -0,0 +1,302 @@
+import os
+import json
+import sqlite3
+import logging
+import mimetypes
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+from utils.file_hash import hash_file
+
+logger = logging.getLogger(__name__)
+
+CATALOG_FIELDS = ("id", "name", "size", "type", "uploadedAt", "status", "progress", "path", "hash",
+                  "message", "error", "updatedAt")
+_SELECT = "SELECT id, name, size, type, uploaded_at, status, progress, path, hash, message, error, updated_at FROM files"
+
+def _with_updated_at(file_metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """Catalog record of a file, stamped with the time it was last written"""
+    record = {field: file_metadata.get(field) for field in CATALOG_FIELDS}
+    record["updatedAt"] = record["updatedAt"] or datetime.now().isoformat()
+    return record
+
+class SQLiteFileCatalog:
+    """File catalog stored in SQLite (WAL mode), safe to share between API worker processes"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.db_path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS files (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    type TEXT,
+                    uploaded_at TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    progress INTEGER NOT NULL DEFAULT 0,
+                    path TEXT NOT NULL,
+                    hash TEXT,
+                    message TEXT,
+                    error TEXT,
+                    updated_at TEXT
+                );
+                CREATE INDEX IF NOT EXISTS files_hash ON files (hash);
+                CREATE INDEX IF NOT EXISTS files_uploaded_at ON files (uploaded_at);
+                """
+            )
+            # Catalogs created before statuses were tracked here lack these columns
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(files)")}
+            for column in ("message", "error", "updated_at"):
+                if column not in columns:
+                    connection.execute(f"ALTER TABLE files ADD COLUMN {column} TEXT")
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _row_to_metadata(row) -> Dict[str, Any]:
+        return dict(zip(CATALOG_FIELDS, row))
+
+    def add_many(self, files: List[Dict[str, Any]], replace: bool = True) -> None:
+        """Register several files in one transaction"""
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                f"""
+                INSERT OR {"REPLACE" if replace else "IGNORE"} INTO files (id, name, size, type, uploaded_at, status, progress, path, hash, message, error, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                [tuple(_with_updated_at(file_metadata).values()) for file_metadata in files]
+            )
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection().execute(
+            _SELECT + " WHERE id = ?",
+            (file_id,)
+        ).fetchone()
+        return self._row_to_metadata(row) if row else None
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All files, oldest upload first"""
+        rows = self._connection().execute(
+            _SELECT + " ORDER BY uploaded_at"
+        ).fetchall()
+        return [self._row_to_metadata(row) for row in rows]
+
+    def find_by_hash(self, file_hash: str) -> List[Dict[str, Any]]:
+        rows = self._connection().execute(
+            _SELECT + " WHERE hash = ?",
+            (file_hash,)
+        ).fetchall()
+        return [self._row_to_metadata(row) for row in rows]
+
+    def delete(self, file_id: str) -> bool:
+        connection = self._connection()
+        with connection:
+            return connection.execute("DELETE FROM files WHERE id = ?", (file_id,)).rowcount > 0
+
+    def update_status(self, file_ids: List[str], status: str, progress: int,
+                      message: Optional[str] = None, error: Optional[str] = None) -> None:
+        updated_at = datetime.now().isoformat()
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "UPDATE files SET status = ?, progress = ?, message = ?, error = ?, updated_at = ? WHERE id = ?",
+                [(status, progress, message, error, updated_at, file_id) for file_id in file_ids]
+            )
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+class RedisFileCatalog:
+    """
+    File catalog stored in Redis: one JSON value per file, a sorted set ordered by
+    upload time and a set per content hash
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "catalog"):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url, decode_responses=True)
+        self.prefix = prefix
+
+    def _file_key(self, file_id: str) -> str:
+        return f"{self.prefix}:file:{file_id}"
+
+    def _hash_key(self, file_hash: str) -> str:
+        return f"{self.prefix}:hash:{file_hash}"
+
+    @property
+    def _uploaded_key(self) -> str:
+        return f"{self.prefix}:uploaded"
+
+    def add_many(self, files: List[Dict[str, Any]], replace: bool = True) -> None:
+        pipeline = self.client.pipeline()
+        for file_metadata in files:
+            record = _with_updated_at(file_metadata)
+            pipeline.set(self._file_key(record["id"]), json.dumps(record), nx=not replace)
+            pipeline.zadd(self._uploaded_key, {record["id"]: datetime.fromisoformat(record["uploadedAt"]).timestamp()},
+                          nx=not replace)
+            if record["hash"]:
+                pipeline.sadd(self._hash_key(record["hash"]), record["id"])
+        pipeline.execute()
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        value = self.client.get(self._file_key(file_id))
+        return json.loads(value) if value else None
+
+    def _get_many(self, file_ids: List[str]) -> List[Dict[str, Any]]:
+        if not file_ids:
+            return []
+        values = self.client.mget([self._file_key(file_id) for file_id in file_ids])
+        return [json.loads(value) for value in values if value]
+
+    def list(self) -> List[Dict[str, Any]]:
+        return self._get_many(self.client.zrange(self._uploaded_key, 0, -1))
+
+    def find_by_hash(self, file_hash: str) -> List[Dict[str, Any]]:
+        return self._get_many(sorted(self.client.smembers(self._hash_key(file_hash))))
+
+    def delete(self, file_id: str) -> bool:
+        record = self.get(file_id)
+        if record is None:
+            return False
+        pipeline = self.client.pipeline()
+        pipeline.delete(self._file_key(file_id))
+        pipeline.zrem(self._uploaded_key, file_id)
+        if record.get("hash"):
+            pipeline.srem(self._hash_key(record["hash"]), file_id)
+        pipeline.execute()
+        return True
+
+    def update_status(self, file_ids: List[str], status: str, progress: int,
+                      message: Optional[str] = None, error: Optional[str] = None) -> None:
+        updated_at = datetime.now().isoformat()
+        pipeline = self.client.pipeline()
+        for record in self._get_many(file_ids):
+            record.update(status=status, progress=progress, message=message, error=error, updatedAt=updated_at)
+            pipeline.set(self._file_key(record["id"]), json.dumps(record), xx=True)
+        pipeline.execute()
+
+    def count(self) -> int:
+        return self.client.zcard(self._uploaded_key)
+
+class FileCatalog:
+    """Catalog of uploaded files, backed by SQLite (default) or Redis (CATALOG_BACKEND=redis)"""
+
+    def __init__(self):
+        self.backend_name = os.getenv("CATALOG_BACKEND", "sqlite").lower()
+        self._backend = None
+
+    @property
+    def backend(self):
+        # Created on first use so importing the API does not touch the database
+        if self._backend is None:
+            if self.backend_name == "redis":
+                self._backend = RedisFileCatalog(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+            elif self.backend_name == "sqlite":
+                self._backend = SQLiteFileCatalog(os.getenv("CATALOG_DB_PATH", os.path.join("uploads", ".catalog.db")))
+            else:
+                raise ValueError(f"Unsupported CATALOG_BACKEND: {self.backend_name}")
+        return self._backend
+
+    def add(self, file_metadata: Dict[str, Any]) -> None:
+        """Register an uploaded file"""
+        self.backend.add_many([file_metadata])
+
+    def add_many(self, files: List[Dict[str, Any]], replace: bool = True) -> None:
+        """Register several uploaded files at once; with replace=False existing entries are kept"""
+        if files:
+            self.backend.add_many(files, replace=replace)
+
+    def get(self, file_id: str) -> Optional[Dict[str, Any]]:
+        """Get a file's metadata, or None if unknown"""
+        return self.backend.get(file_id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All files, oldest upload first"""
+        return self.backend.list()
+
+    def find_by_hash(self, file_hash: str) -> List[Dict[str, Any]]:
+        """Files whose content has the given SHA-256"""
+        return self.backend.find_by_hash(file_hash)
+
+    def delete(self, file_id: str) -> bool:
+        """Remove a file from the catalog"""
+        return self.backend.delete(file_id)
+
+    def update_status(self, file_ids: List[str], status: str, progress: int,
+                      message: Optional[str] = None, error: Optional[str] = None) -> None:
+        """
+        Record the latest processing status of files. This copy is shared by every API
+        worker and consumer and is the source of truth for status; the per-process
+        status_service only takes precedence while its entry is newer (see `updatedAt`).
+        """
+        if file_ids:
+            self.backend.update_status(file_ids, status, progress, message, error)
+
+    def count(self) -> int:
+        return self.backend.count()
+
+    def __contains__(self, file_id: str) -> bool:
+        return self.get(file_id) is not None
+
+    def reconcile(self, upload_dir: str) -> Dict[str, int]:
+        """
+        Bring the catalog in line with the upload directory:
+        - entries whose file no longer exists are removed
+        - files on disk without an entry (e.g. uploaded before a restart with the
+          old in-memory catalog) are registered from what the file system knows
+
+        Run once before the API starts serving (see run.py): an upload saved but not
+        yet registered would otherwise be picked up as an orphan. Recovered entries
+        never overwrite an existing one.
+
+        Returns:
+            dict: number of entries removed and recovered
+        """
+        removed = 0
+        known_paths = set()
+        for file_metadata in self.list():
+            if os.path.exists(file_metadata["path"]):
+                known_paths.add(os.path.abspath(file_metadata["path"]))
+            elif self.delete(file_metadata["id"]):
+                removed += 1
+
+        recovered = []
+        for filename in sorted(os.listdir(upload_dir)) if os.path.isdir(upload_dir) else []:
+            file_path = os.path.join(upload_dir, filename)
+            # Skip hidden files (the catalog database) and consumer completion markers
+            if filename.startswith(".") or filename.endswith(".done") or not os.path.isfile(file_path):
+                continue
+            if os.path.abspath(file_path) in known_paths:
+                continue
+            stat = os.stat(file_path)
+            recovered.append({
+                "id": os.path.splitext(filename)[0],
+                "name": filename,
+                "size": stat.st_size,
+                "type": mimetypes.guess_type(filename)[0],
+                "uploadedAt": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+                "status": "uploaded",
+                "progress": 0,
+                "path": file_path,
+                "hash": hash_file(file_path)
+            })
+        self.add_many(recovered, replace=False)
+
+        if removed or recovered:
+            logger.info(f"Catalog reconciled with {upload_dir}: {removed} removed, {len(recovered)} recovered")
+        return {"removed": removed, "recovered": len(recovered)}
+
+# Global file catalog instance
+file_catalog = FileCatalog()
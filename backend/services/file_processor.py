@@ -1,10 +1,10 @@
 import os
 import json
-import pika
 import logging
 from typing import Dict, Any
 from utils.document_loaders import process_and_index
 from services.status_service import status_service
+from services.file_catalog import file_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -14,6 +14,57 @@ class FileProcessor:
     def __init__(self):
         self.status_service = status_service
     
+    @staticmethod
+    def completion_marker_path(file_path: str) -> str:
+        """Path of the marker recording that one copy of a twice-delivered task completed"""
+        return f"{file_path}.done"
+    
+    def _take_completion_marker(self, file_path: str) -> bool:
+        """
+        Consume the completion marker left by the other copy of a task.
+        
+        Tasks with an aged copy (see QueueService.publish_file_processing_task) are
+        delivered twice. The marker is only written once processing succeeded, so a
+        redelivery of an interrupted job still runs; re-indexing is idempotent since
+        vector ids are content hashes. The marker lives next to the upload so it is
+        shared by all consumers.
+        
+        Returns:
+            bool: True if the other copy already completed and this delivery can be skipped
+        """
+        try:
+            os.remove(self.completion_marker_path(file_path))
+            return True
+        except FileNotFoundError:
+            return False
+    
+    def _record_completion(self, file_path: str):
+        """Leave a completion marker for the other copy of a task"""
+        marker = self.completion_marker_path(file_path)
+        try:
+            fd = os.open(marker, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.close(fd)
+        except FileExistsError:
+            # Both copies ran concurrently; neither delivery is left to skip
+            os.remove(marker)
+    
+    def _update_status(self, file_id: str, status: str, progress: int, message: str, error: str = None):
+        """
+        Record a status in this process and in the shared catalog. The catalog is only
+        bookkeeping: failing to write it is logged and never changes the job's outcome.
+        """
+        self.status_service.update_file_status(
+            file_id=file_id,
+            status=status,
+            progress=progress,
+            message=message,
+            error=error
+        )
+        try:
+            file_catalog.update_status([file_id], status, progress, message, error)
+        except Exception as e:
+            logger.error(f"Failed to record status {status} of file {file_id} in the catalog: {e}")
+    
     def process_file_message(self, ch, method, properties, body):
         """
         Process a file message from RabbitMQ queue
@@ -30,11 +81,17 @@ class FileProcessor:
             file_id = message.get("file_id")
             file_path = message.get("file_path")
             file_name = message.get("file_name")
+            has_aged_copy = message.get("has_aged_copy", False)
+            
+            if has_aged_copy and self._take_completion_marker(file_path):
+                logger.info(f"Skipping second delivery of completed file: {file_name} (ID: {file_id})")
+                ch.basic_ack(delivery_tag=method.delivery_tag)
+                return
             
             logger.info(f"Processing file: {file_name} (ID: {file_id})")
             
             # Update status to processing
-            self.status_service.update_file_status(
+            self._update_status(
                 file_id=file_id,
                 status="processing",
                 progress=10,
@@ -46,7 +103,7 @@ class FileProcessor:
                 raise FileNotFoundError(f"File not found: {file_path}")
             
             # Update status to parsing
-            self.status_service.update_file_status(
+            self._update_status(
                 file_id=file_id,
                 status="parsing",
                 progress=30,
@@ -63,7 +120,7 @@ class FileProcessor:
                 )
                 
                 # Update status to embedding
-                self.status_service.update_file_status(
+                self._update_status(
                     file_id=file_id,
                     status="embedding",
                     progress=70,
@@ -71,18 +128,21 @@ class FileProcessor:
                 )
                 
                 # Update status to completed
-                self.status_service.update_file_status(
+                self._update_status(
                     file_id=file_id,
                     status="completed",
                     progress=100,
                     message=f"File ready for chat! Processed {num_vectors} chunks into Pinecone index '{index_name}'"
                 )
                 
+                if has_aged_copy:
+                    self._record_completion(file_path)
+                
                 logger.info(f"Successfully processed file {file_name}: {num_vectors} vectors created")
                 
             except Exception as e:
                 logger.error(f"Error processing file {file_name}: {e}")
-                self.status_service.update_file_status(
+                self._update_status(
                     file_id=file_id,
                     status="failed",
                     progress=0,
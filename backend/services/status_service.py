@@ -1,6 +1,6 @@
 import os
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 import logging
 
@@ -26,6 +26,18 @@ class StatusService:
             message: Status message
             error: Error message if failed
         """
+        self._set_status(file_id, status, progress, message, error)
+        logger.info(f"Updated status for file {file_id}: {status} ({progress}%)")
+    
+    def update_file_statuses(self, file_ids: List[str], status: str, progress: int = None,
+                             message: str = None, error: str = None) -> None:
+        """Set the same status on several files at once (see update_file_status)"""
+        for file_id in file_ids:
+            self._set_status(file_id, status, progress, message, error)
+        logger.info(f"Updated status for {len(file_ids)} files: {status} ({progress}%)")
+    
+    def _set_status(self, file_id: str, status: str, progress: Optional[int],
+                    message: Optional[str], error: Optional[str]) -> None:
         if file_id not in self.file_statuses:
             self.file_statuses[file_id] = {
                 "file_id": file_id,
@@ -49,8 +61,6 @@ class StatusService:
         
         if error is not None:
             self.file_statuses[file_id]["error"] = error
-        
-        logger.info(f"Updated status for file {file_id}: {status} ({progress}%)")
     
     def get_file_status(self, file_id: str) -> Optional[Dict[str, Any]]:
         """Get the current status of a file"""
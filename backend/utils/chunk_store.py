@@ -0,0 +1,161 @@
+import os
+import mmap
+import struct
+import threading
+import logging
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-writer use only
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Index record: vector id (16 ASCII bytes, NUL padded), byte offset, byte length
+_INDEX_RECORD = struct.Struct("<16sQI")
+MAX_ID_LENGTH = _INDEX_RECORD.size - 12
+
+
+class ChunkStore:
+    """
+    Append-only store for chunk text keyed by vector id.
+
+    Text is appended to `chunks.dat`; `chunks.idx` holds fixed-size (id, offset, length)
+    records. Readers memory-map the data file and pick up records appended by other
+    processes (e.g. the consumer) on the next lookup, so hydrating top-k hits is a dict
+    lookup plus a slice of the mapping.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.getenv("CHUNK_STORE_DIR", "chunk_store")
+        self.data_path = os.path.join(self.directory, "chunks.dat")
+        self.index_path = os.path.join(self.directory, "chunks.idx")
+        self._offsets: Dict[str, Tuple[int, int]] = {}
+        self._index_size = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._lock = threading.Lock()
+
+    def _refresh_index(self) -> None:
+        """Load index records appended since the last refresh."""
+        try:
+            size = os.path.getsize(self.index_path)
+        except FileNotFoundError:
+            return
+        # Ignore a trailing partial record from a concurrent writer
+        size -= size % _INDEX_RECORD.size
+        if size <= self._index_size:
+            return
+
+        with open(self.index_path, "rb") as index_file:
+            index_file.seek(self._index_size)
+            buffer = index_file.read(size - self._index_size)
+        for raw_id, offset, length in _INDEX_RECORD.iter_unpack(buffer):
+            self._offsets[raw_id.rstrip(b"\0").decode("ascii")] = (offset, length)
+        self._index_size = size
+
+    def _mapping(self, required_size: int) -> Optional[mmap.mmap]:
+        """Return a read-only mapping of the data file covering `required_size` bytes."""
+        if self._mmap is not None and len(self._mmap) >= required_size:
+            return self._mmap
+        if not os.path.exists(self.data_path) or os.path.getsize(self.data_path) < required_size:
+            return None
+        with open(self.data_path, "rb") as data_file:
+            # The previous mapping is released once outstanding memoryviews are dropped
+            self._mmap = mmap.mmap(data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mmap
+
+    def append_many(self, chunks: Iterable[Tuple[str, str]]) -> int:
+        """
+        Append (id, text) pairs, skipping ids already present.
+
+        Returns:
+            int: Number of chunks written
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock, open(self.index_path, "ab") as index_file, open(self.data_path, "ab") as data_file:
+            if fcntl is not None:
+                fcntl.flock(index_file.fileno(), fcntl.LOCK_EX)
+            try:
+                self._refresh_index()
+                # Drop a partial record left by an interrupted writer
+                index_file.truncate(self._index_size)
+                offset = data_file.seek(0, os.SEEK_END)
+                records: List[bytes] = []
+                pending: Dict[str, Tuple[int, int]] = {}
+                for chunk_id, text in chunks:
+                    if chunk_id in self._offsets or chunk_id in pending:
+                        continue
+                    raw_id = chunk_id.encode("ascii")
+                    if len(raw_id) > MAX_ID_LENGTH:
+                        raise ValueError(f"Chunk id longer than {MAX_ID_LENGTH} bytes: {chunk_id}")
+                    encoded = text.encode("utf-8")
+                    data_file.write(encoded)
+                    records.append(_INDEX_RECORD.pack(raw_id, offset, len(encoded)))
+                    pending[chunk_id] = (offset, len(encoded))
+                    offset += len(encoded)
+
+                # Data must be on disk before the index points at it
+                data_file.flush()
+                os.fsync(data_file.fileno())
+                index_file.write(b"".join(records))
+                index_file.flush()
+                self._offsets.update(pending)
+                self._index_size += len(records) * _INDEX_RECORD.size
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(index_file.fileno(), fcntl.LOCK_UN)
+
+        logger.info(f"Stored {len(records)} chunk(s) in {self.data_path}")
+        return len(records)
+
+    def get_bytes(self, chunk_id: str) -> Optional[memoryview]:
+        """Zero-copy view of a chunk's UTF-8 bytes, or None if unknown."""
+        with self._lock:
+            entry = self._offsets.get(chunk_id)
+            if entry is None:
+                self._refresh_index()
+                entry = self._offsets.get(chunk_id)
+                if entry is None:
+                    return None
+            offset, length = entry
+            mapping = self._mapping(offset + length)
+            if mapping is None:
+                return None
+            return memoryview(mapping)[offset:offset + length]
+
+    def get(self, chunk_id: str) -> Optional[str]:
+        """Return the text of a chunk, or None if unknown."""
+        view = self.get_bytes(chunk_id)
+        if view is None:
+            return None
+        with view:
+            return str(view, "utf-8")
+
+    def get_many(self, chunk_ids: Iterable[str]) -> Dict[str, str]:
+        """Return {id: text} for the ids found in the store."""
+        texts = {}
+        for chunk_id in chunk_ids:
+            text = self.get(chunk_id)
+            if text is not None:
+                texts[chunk_id] = text
+        return texts
+
+    def hydrate_matches(self, matches: List[Dict]) -> List[Dict]:
+        """Attach `text` to vector query matches (dicts with an `id` key)."""
+        texts = self.get_many(match["id"] for match in matches)
+        return [{**match, "text": texts.get(match["id"])} for match in matches]
+
+    def __contains__(self, chunk_id: str) -> bool:
+        with self._lock:
+            self._refresh_index()
+            return chunk_id in self._offsets
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._refresh_index()
+            return len(self._offsets)
+
+
+# Global chunk store instance
+chunk_store = ChunkStore()
@@ -0,0 +1,273 @@
+import os
+import re
+import zlib
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class MinHasher:
+    """
+    MinHash signatures over character shingles of normalized text.
+    Uses 32-bit shingle hashes and (a * x + b) mod p permutations, which fit in uint64.
+    """
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.randint(1, 1 << 31, size=num_perm, dtype=np.uint64)
+        self._b = rng.randint(0, 1 << 31, size=num_perm, dtype=np.uint64)
+
+    def _shingles(self, text: str) -> np.ndarray:
+        normalized = re.sub(r"\s+", " ", text.lower()).strip()
+        k = self.shingle_size
+        if len(normalized) <= k:
+            shingles = {normalized}
+        else:
+            shingles = {normalized[i:i + k] for i in range(len(normalized) - k + 1)}
+        return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles),
+                           dtype=np.uint64, count=len(shingles))
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = self._shingles(text)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME & _MAX_HASH
+        return permuted.min(axis=0)
+
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures"""
+    return float(np.mean(first == second))
+
+
+def dedup_scope(index_name: str, namespace: Optional[str] = None, model: Optional[str] = None,
+                dimensions: Optional[int] = None) -> str:
+    """
+    Key of the ingest target a chunk is indexed into. A chunk is only a duplicate of
+    chunks indexed into the same target; ingesting the same corpus into another
+    index, namespace or embedding configuration starts from an empty index.
+    """
+    return "|".join((index_name or "", namespace or "", model or "", str(dimensions or "")))
+
+
+class ChunkDeduplicator:
+    """
+    Near-duplicate chunk filter backed by a MinHash LSH index in SQLite.
+
+    Signatures are split into `bands` bands of `num_perm / bands` rows; chunks sharing a
+    band bucket are candidates, and a candidate whose estimated similarity is at least
+    `threshold` is treated as a duplicate. Within a scope (see `dedup_scope`) the index is
+    shared by every file (and every process using the same database), so boilerplate
+    repeated across the corpus is only embedded once. Dropped chunks are recorded with a
+    back-reference to the chunk that was kept.
+
+    Usage per upsert batch: `filter` the documents, upsert the kept ones, then `commit`,
+    passing the same scope. Nothing is written to the index unless the batch is committed.
+    The LSH index can outlive the vector index it describes (e.g. an index deleted and
+    recreated under the same name), so `filter` takes an `exists` check against the vector
+    index and forgets chunks that are no longer there instead of dropping their duplicates.
+    """
+
+    def __init__(self, path: Optional[str] = None, threshold: Optional[float] = None,
+                 num_perm: int = 128, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        # Kept next to the chunk store by default so the API and consumers share it
+        default_path = os.path.join(os.getenv("CHUNK_STORE_DIR", "chunk_store"), "dedup_index.db")
+        self.path = path or os.getenv("DEDUP_INDEX_PATH", default_path)
+        self.threshold = threshold if threshold is not None else float(os.getenv("DEDUP_THRESHOLD", "0.9"))
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm=num_perm)
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            if connection.execute("PRAGMA user_version").fetchone()[0] < 1:
+                # Indexes written before scoping cannot be attributed to a target; rebuild
+                connection.executescript(
+                    """
+                    DROP TABLE IF EXISTS signatures;
+                    DROP TABLE IF EXISTS buckets;
+                    DROP TABLE IF EXISTS duplicates;
+                    PRAGMA user_version = 1;
+                    """
+                )
+            connection.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS signatures (
+                    scope TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    source TEXT,
+                    chunk INTEGER,
+                    signature BLOB NOT NULL,
+                    PRIMARY KEY (scope, chunk_id)
+                );
+                CREATE TABLE IF NOT EXISTS buckets (
+                    scope TEXT NOT NULL,
+                    band INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    chunk_id TEXT NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (scope, band, bucket);
+                CREATE TABLE IF NOT EXISTS duplicates (
+                    scope TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    chunk INTEGER NOT NULL,
+                    canonical_id TEXT NOT NULL,
+                    similarity REAL NOT NULL,
+                    PRIMARY KEY (scope, source, chunk)
+                );
+                CREATE INDEX IF NOT EXISTS duplicates_canonical ON duplicates (scope, canonical_id);
+                """
+            )
+            self._local.connection = connection
+        return connection
+
+    def _band_keys(self, signature: np.ndarray) -> List[Tuple[int, int]]:
+        keys = []
+        for band in range(self.bands):
+            digest = hashlib.blake2b(signature[band * self.rows:(band + 1) * self.rows].tobytes(), digest_size=8)
+            keys.append((band, int.from_bytes(digest.digest(), "big", signed=True)))
+        return keys
+
+    def _find_duplicate(self, scope: str, signature: np.ndarray, keys: List[Tuple[int, int]],
+                        pending: Dict[Tuple[int, int], List[Tuple[str, np.ndarray]]]) -> Optional[Tuple[str, float]]:
+        candidates: Dict[str, Optional[np.ndarray]] = {}
+        connection = self._connection()
+        for key in keys:
+            for chunk_id, candidate in pending.get(key, []):
+                candidates[chunk_id] = candidate
+            for (chunk_id,) in connection.execute(
+                "SELECT chunk_id FROM buckets WHERE scope = ? AND band = ? AND bucket = ?", (scope, *key)
+            ):
+                candidates.setdefault(chunk_id, None)
+
+        best: Optional[Tuple[str, float]] = None
+        for chunk_id, candidate in candidates.items():
+            if candidate is None:
+                row = connection.execute(
+                    "SELECT signature FROM signatures WHERE scope = ? AND chunk_id = ?", (scope, chunk_id)
+                ).fetchone()
+                if row is None:
+                    continue
+                candidate = np.frombuffer(row[0], dtype=np.uint64)
+            similarity = estimate_similarity(signature, candidate)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (chunk_id, similarity)
+        return best
+
+    def filter(self, documents: Sequence, ids: Sequence[str], scope: str,
+               exists: Optional[Callable[[List[str]], Iterable[str]]] = None):
+        """
+        Split a batch into chunks to index and near-duplicates to drop.
+
+        Args:
+            documents: LangChain Documents of the batch
+            ids: Vector ids of the documents (same order)
+            scope: Ingest target the batch is indexed into (see `dedup_scope`)
+            exists: Optional lookup returning which of the given ids are in the vector index;
+                    chunks it does not return are forgotten and their duplicates kept
+
+        Returns:
+            (kept, duplicates): kept is a list of (id, document, signature, band keys);
+            duplicates is a list of (document, canonical id, similarity)
+        """
+        while True:
+            kept, duplicates = self._filter(documents, ids, scope)
+            if exists is None:
+                return kept, duplicates
+            kept_ids = {chunk_id for chunk_id, _, _, _ in kept}
+            canonical_ids = {canonical_id for _, canonical_id, _ in duplicates if canonical_id not in kept_ids}
+            missing = canonical_ids - set(exists(sorted(canonical_ids))) if canonical_ids else set()
+            if not missing:
+                return kept, duplicates
+            logger.info(f"Forgetting {len(missing)} chunks of {scope} missing from the vector index")
+            self.forget(missing, scope)
+
+    def _filter(self, documents: Sequence, ids: Sequence[str], scope: str):
+        kept = []
+        duplicates = []
+        pending: Dict[Tuple[int, int], List[Tuple[str, np.ndarray]]] = {}
+        seen_ids = set()
+
+        for doc, chunk_id in zip(documents, ids):
+            if chunk_id in seen_ids:
+                duplicates.append((doc, chunk_id, 1.0))
+                continue
+            signature = self.hasher.signature(doc.page_content)
+            keys = self._band_keys(signature)
+            match = self._find_duplicate(scope, signature, keys, pending)
+            if match is not None:
+                duplicates.append((doc, match[0], match[1]))
+                continue
+            kept.append((chunk_id, doc, signature, keys))
+            seen_ids.add(chunk_id)
+            for key in keys:
+                pending.setdefault(key, []).append((chunk_id, signature))
+
+        return kept, duplicates
+
+    def commit(self, kept, duplicates, scope: str) -> None:
+        """Record kept chunks in the LSH index and back-references for dropped ones"""
+        connection = self._connection()
+        with connection:
+            for chunk_id, doc, signature, keys in kept:
+                metadata = doc.metadata or {}
+                inserted = connection.execute(
+                    "INSERT OR IGNORE INTO signatures (scope, chunk_id, source, chunk, signature) VALUES (?, ?, ?, ?, ?)",
+                    (scope, chunk_id, str(metadata.get("source", "unknown")), metadata.get("chunk"), signature.tobytes())
+                ).rowcount
+                if inserted:
+                    connection.executemany(
+                        "INSERT INTO buckets (scope, band, bucket, chunk_id) VALUES (?, ?, ?, ?)",
+                        [(scope, band, bucket, chunk_id) for band, bucket in keys]
+                    )
+            for doc, canonical_id, similarity in duplicates:
+                metadata = doc.metadata or {}
+                source, chunk = str(metadata.get("source", "unknown")), metadata.get("chunk", 0)
+                # Re-ingesting the same chunk is not a back-reference to itself
+                connection.execute(
+                    """
+                    INSERT OR REPLACE INTO duplicates (scope, source, chunk, canonical_id, similarity)
+                    SELECT ?, ?, ?, ?, ?
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM signatures WHERE scope = ? AND chunk_id = ? AND source = ? AND chunk = ?
+                    )
+                    """,
+                    (scope, source, chunk, canonical_id, similarity, scope, canonical_id, source, chunk)
+                )
+
+    def forget(self, chunk_ids: Iterable[str], scope: str) -> None:
+        """Remove chunks (and the back-references to them) from the LSH index of `scope`"""
+        rows = [(scope, chunk_id) for chunk_id in chunk_ids]
+        connection = self._connection()
+        with connection:
+            connection.executemany("DELETE FROM signatures WHERE scope = ? AND chunk_id = ?", rows)
+            connection.executemany("DELETE FROM buckets WHERE scope = ? AND chunk_id = ?", rows)
+            connection.executemany("DELETE FROM duplicates WHERE scope = ? AND canonical_id = ?", rows)
+
+    def get_duplicates(self, chunk_id: str, scope: str) -> List[Dict]:
+        """Back-references: chunks of `scope` that were dropped in favour of `chunk_id`"""
+        rows = self._connection().execute(
+            "SELECT source, chunk, similarity FROM duplicates WHERE scope = ? AND canonical_id = ? ORDER BY source, chunk",
+            (scope, chunk_id)
+        ).fetchall()
+        return [{"source": source, "chunk": chunk, "similarity": similarity} for source, chunk, similarity in rows]
+
+
+# Global deduplicator instance
+chunk_deduplicator = ChunkDeduplicator()
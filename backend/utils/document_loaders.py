@@ -1,81 +1,223 @@
 import os
+import time
 import hashlib
-from typing import List, Dict, Optional, Tuple
+import logging
+import threading
+from concurrent.futures import Future, wait
+from typing import TYPE_CHECKING, Iterator, List, Dict, Optional, Set, Tuple
 
-from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_core.documents import Document
+import numpy as np
 
-# Embeddings via local Ollama
-import ollama
+from utils.chunk_store import chunk_store
+from utils.embedding_compression import (
+    SUPPORTED_DTYPES,
+    compress_embeddings,
+    resolve_embedding_dimensions,
+    truncate_embeddings,
+)
 
-# Pinecone client
-try:
-    # Prefer modern pinecone package if available
-    from pinecone import Pinecone
-    _PINECONE_V3 = True
-except Exception:
-    # Fallback to older client
-    from pinecone import Index, PineconeException, init as pinecone_init
-    _PINECONE_V3 = False
+# LangChain, Ollama and Pinecone are imported on first use so that importing
+# this module (API and consumer startup) stays cheap.
+if TYPE_CHECKING:
+    from langchain_core.documents import Document
 
+logger = logging.getLogger(__name__)
 
-def load_document_loader(file_path: str):
-    """Return an appropriate LangChain loader for the given file path."""
-    if file_path.endswith('.pdf'):
+# How long Ollama keeps the embedding model loaded after a request
+OLLAMA_KEEP_ALIVE = os.environ.get("OLLAMA_KEEP_ALIVE", "30m")
+
+# Texts sent to Ollama per embedding request
+EMBED_BATCH_SIZE = int(os.environ.get("EMBED_BATCH_SIZE", "32"))
+
+# Precision of the optional local embedding cache (see _save_embedding_cache).
+# Checked at import so a typo fails startup instead of every job after its upsert.
+EMBEDDING_CACHE_DTYPE = os.environ.get("EMBEDDING_CACHE_DTYPE", "float16")
+if EMBEDDING_CACHE_DTYPE not in SUPPORTED_DTYPES:
+    raise ValueError(f"Unsupported EMBEDDING_CACHE_DTYPE: {EMBEDDING_CACHE_DTYPE}. "
+                     f"Supported: {', '.join(SUPPORTED_DTYPES)}")
+
+# Pinecone index handles, reused across jobs
+_pinecone_indexes: Dict[str, object] = {}
+
+# Chunks embedded and upserted per Pinecone request by process_and_index
+UPSERT_BATCH_SIZE = 100
+
+# Drop near-duplicate chunks (MinHash/LSH, see utils.dedup) before embedding
+INGEST_DEDUP = os.environ.get("INGEST_DEDUP", "true").lower() == "true"
+
+# CSV / JSON / JSON Lines are streamed row by row (see utils.structured_loaders)
+STRUCTURED_EXTENSIONS = (".csv", ".json", ".jsonl", ".ndjson")
+
+
+def load_document_loader(file_path: str, chunk_size: int = 800, chunk_overlap: int = 120):
+    """
+    Return an appropriate LangChain loader for the given file path.
+    Loaders for row-oriented files produce ready-sized chunks (`pre_chunked`).
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension in STRUCTURED_EXTENSIONS:
+        from utils.structured_loaders import load_structured_loader
+        return load_structured_loader(file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+    from langchain_community.document_loaders import PyPDFLoader, Docx2txtLoader, TextLoader
+
+    if extension == '.pdf':
         return PyPDFLoader(file_path)
-    elif file_path.endswith('.docx'):
+    elif extension == '.docx':
         return Docx2txtLoader(file_path)
-    elif file_path.endswith('.txt'):
+    elif extension == '.txt':
         return TextLoader(file_path, encoding="utf-8")
     else:
         raise ValueError(f"Unsupported file type: {file_path}")
 
 
-def load_and_split(file_path: str,
-                   chunk_size: int = 800,
-                   chunk_overlap: int = 120) -> List[Document]:
+def iter_chunks(file_path: str,
+                chunk_size: int = 800,
+                chunk_overlap: int = 120) -> Iterator["Document"]:
     """
-    Load a document from disk and split into smaller chunks.
-    Returns a list of LangChain Document objects.
+    Yield the chunks of a document from disk.
+    Row-oriented files are streamed and chunked on row boundaries; other
+    documents are loaded whole and split with a recursive character splitter.
     """
-    loader = load_document_loader(file_path)
-    raw_docs = loader.load()
+    loader = load_document_loader(file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if getattr(loader, "pre_chunked", False):
+        documents = loader.lazy_load()
+    else:
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=chunk_size,
-        chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", " ", ""]
-    )
-    documents = text_splitter.split_documents(raw_docs)
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=["\n\n", "\n", " ", ""]
+        )
+        documents = text_splitter.split_documents(loader.load())
 
     # Attach simple source metadata if missing
     for idx, doc in enumerate(documents):
         doc.metadata = doc.metadata or {}
         doc.metadata.setdefault("source", os.path.basename(file_path))
         doc.metadata.setdefault("chunk", idx)
+        yield doc
+
 
-    return documents
+def load_and_split(file_path: str,
+                   chunk_size: int = 800,
+                   chunk_overlap: int = 120) -> List["Document"]:
+    """
+    Load a document from disk and split into smaller chunks.
+    Returns a list of LangChain Document objects.
+    """
+    return list(iter_chunks(file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap))
 
 
 def _hash_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
 
 
-def embed_texts_ollama(texts: List[str], model: str = "mxbai-embed-large") -> List[List[float]]:
+def embed_texts_ollama(texts: List[str], model: str = "mxbai-embed-large") -> np.ndarray:
     """
     Generate embeddings for a list of texts using a local Ollama model.
+    Texts are sent EMBED_BATCH_SIZE at a time through Ollama's batch endpoint.
     Requires the Ollama daemon to be running and the model pulled.
+    Returns a float32 array of shape (len(texts), dimensions).
     """
-    embeddings: List[List[float]] = []
-    for text in texts:
-        response = ollama.embeddings(model=model, prompt=text)
-        embeddings.append(response["embedding"])  # type: ignore[index]
+    import ollama
+
+    embeddings: Optional[np.ndarray] = None
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        response = ollama.embed(model=model, input=texts[start:start + EMBED_BATCH_SIZE],
+                                keep_alive=OLLAMA_KEEP_ALIVE)
+        batch = np.asarray(response["embeddings"], dtype=np.float32)  # type: ignore[index]
+        if embeddings is None:
+            embeddings = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+        embeddings[start:start + len(batch)] = batch
+    if embeddings is None:
+        return np.empty((0, 0), dtype=np.float32)
     return embeddings
 
 
+class UpsertBatcher:
+    """
+    Combine upserts from several threads into shared Pinecone requests of up to
+    `batch_size` vectors per index and namespace.
+
+    A caller waits until its vectors have been sent. A request goes out when it is
+    full, or once the oldest waiting caller has lingered for `linger` seconds, so
+    many small files cost a few large upserts instead of one request each.
+    """
+
+    def __init__(self, batch_size: int = None, linger: float = 0.2):
+        self.batch_size = batch_size or UPSERT_BATCH_SIZE
+        self.linger = linger
+        self._lock = threading.Lock()
+        self._pending: Dict[Tuple[int, Optional[str]], Dict] = {}
+
+    def upsert(self, index, items: List[Dict], namespace: Optional[str] = None) -> None:
+        """Upsert `items` as part of a shared request; raises if that request fails"""
+        key = (id(index), namespace)
+        future: Future = Future()
+        ready = []
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is not None and entry["size"] + len(items) > self.batch_size:
+                ready.append(self._pending.pop(key))
+                entry = None
+            if entry is None:
+                entry = {"index": index, "namespace": namespace, "parts": [], "size": 0}
+                self._pending[key] = entry
+            entry["parts"].append((items, future))
+            entry["size"] += len(items)
+            if entry["size"] >= self.batch_size:
+                ready.append(self._pending.pop(key))
+        for full_entry in ready:
+            self._send(full_entry)
+
+        if not wait([future], timeout=self.linger).done:
+            # Not filled in time: send the request unless another caller already took it
+            with self._lock:
+                lingering = self._pending.get(key) is entry
+                if lingering:
+                    del self._pending[key]
+            if lingering:
+                self._send(entry)
+        future.result()
+
+    @staticmethod
+    def _send(entry: Dict) -> None:
+        items = [item for part, _ in entry["parts"] for item in part]
+        try:
+            entry["index"].upsert(vectors=items, namespace=entry["namespace"])
+        except Exception as e:
+            for _, future in entry["parts"]:
+                future.set_exception(e)
+            return
+        for _, future in entry["parts"]:
+            future.set_result(len(items))
+
+
+def _save_embedding_cache(ids: List[str], vectors: np.ndarray, source: str, first_chunk: int = 0) -> None:
+    """
+    Write a compact local copy of the vectors when EMBEDDING_CACHE_DIR is set.
+    EMBEDDING_CACHE_DTYPE selects float32, float16 or int8 (default float16).
+    One file is written per upsert batch, named after the source, a hash of its full
+    path (files with the same name in different directories do not collide) and its
+    first chunk. The cache is best effort: the vectors are already indexed, so a
+    failed write is logged rather than failing the job.
+    """
+    cache_dir = os.environ.get("EMBEDDING_CACHE_DIR")
+    if not cache_dir:
+        return
+    cache_name = os.path.splitext(os.path.basename(source))[0]
+    path_hash = _hash_text(os.path.abspath(source))[:8]
+    try:
+        compressed = compress_embeddings(vectors, dtype=EMBEDDING_CACHE_DTYPE, ids=ids)
+        compressed.save(os.path.join(cache_dir, f"{cache_name}-{path_hash}-{first_chunk:06d}.npz"))
+    except Exception as e:
+        logger.warning(f"Could not write embedding cache for {source}: {e}")
+
+
 def _get_pinecone_index(index_name: Optional[str] = None):
-    """Initialize and return a Pinecone index handle."""
+    """Initialize (once per index name) and return a Pinecone index handle."""
     api_key = os.environ.get("PINECONE_API_KEY")
     if not api_key:
         raise RuntimeError("PINECONE_API_KEY is not set in environment")
@@ -84,26 +226,79 @@ def _get_pinecone_index(index_name: Optional[str] = None):
     if not resolved_index:
         raise RuntimeError("PINECONE_INDEX_NAME not provided and not set in environment")
 
-    if _PINECONE_V3:
+    if resolved_index in _pinecone_indexes:
+        return _pinecone_indexes[resolved_index]
+
+    try:
+        # Prefer modern pinecone package if available
+        from pinecone import Pinecone
         pc = Pinecone(api_key=api_key)
-        return pc.Index(resolved_index)
-    else:
+        index = pc.Index(resolved_index)
+    except ImportError:
         # Older client path (kept for compatibility)
+        from pinecone import Index, init as pinecone_init
         pinecone_env = os.environ.get("PINECONE_ENVIRONMENT")
         if not pinecone_env:
             raise RuntimeError("PINECONE_ENVIRONMENT must be set for legacy pinecone client")
         pinecone_init(api_key=api_key, environment=pinecone_env)
-        return Index(resolved_index)
+        index = Index(resolved_index)
+
+    _pinecone_indexes[resolved_index] = index
+    return index
+
+
+def _indexed_ids(index, ids: List[str], namespace: Optional[str] = None) -> Set[str]:
+    """Return the subset of `ids` present in the Pinecone index"""
+    found: Set[str] = set()
+    for start in range(0, len(ids), 100):
+        response = index.fetch(ids=ids[start:start + 100], namespace=namespace)
+        # FetchResponse in the modern client, a dict in the legacy one
+        vectors = response["vectors"] if isinstance(response, dict) else response.vectors
+        found.update(vectors)
+    return found
+
+
+def warm_up(index_name: Optional[str] = None, model: str = "mxbai-embed-large") -> Dict[str, float]:
+    """
+    Pay one-off startup costs before the first job arrives:
+    import the loaders, load the embedding model into Ollama (kept resident via
+    keep_alive) and build the Pinecone index client.
+    Returns the time spent in each step, in seconds.
+    """
+    timings: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    import langchain_community.document_loaders  # noqa: F401
+    import langchain_text_splitters  # noqa: F401
+    timings["imports"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    embed_texts_ollama(["warm-up"], model=model)
+    timings["embedding_model"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index = _get_pinecone_index(index_name)
+    index.describe_index_stats()
+    timings["index_client"] = time.perf_counter() - started
+
+    logger.info("Warm-up complete: " + ", ".join(f"{step}={seconds:.2f}s" for step, seconds in timings.items()))
+    return timings
 
 
-def upsert_documents_to_pinecone(documents: List[Document],
+def upsert_documents_to_pinecone(documents: List["Document"],
                                  index_name: Optional[str] = None,
                                  namespace: Optional[str] = None,
-                                 model: str = "mxbai-embed-large") -> Tuple[int, str]:
+                                 model: str = "mxbai-embed-large",
+                                 dimensions: Optional[int] = None,
+                                 batcher: Optional[UpsertBatcher] = None) -> Tuple[int, str]:
     """
     Create embeddings for provided Documents and upsert into Pinecone.
     - Each vector id is derived from a stable hash of the content.
-    - Metadata includes `source` and `chunk` by default.
+    - Metadata includes `source` and `chunk` by default; the chunk text itself is
+      written to the local chunk store under the same id.
+    - `dimensions` (or EMBEDDING_DIMENSIONS) truncates vectors Matryoshka-style;
+      the Pinecone index must have been created with the same dimension.
+    - With a `batcher`, the upsert shares a request with other threads' documents.
 
     Returns (num_vectors_upserted, index_name_used)
     """
@@ -112,26 +307,32 @@ def upsert_documents_to_pinecone(documents: List[Document],
 
     texts = [d.page_content for d in documents]
     vectors = embed_texts_ollama(texts, model=model)
+    vectors = truncate_embeddings(vectors, resolve_embedding_dimensions(dimensions))
 
     index = _get_pinecone_index(index_name)
 
+    ids = [_hash_text(text) for text in texts]
     items = []
-    for doc, vector in zip(documents, vectors):
-        vector_id = _hash_text(doc.page_content)
+    for doc, vector_id, vector in zip(documents, ids, vectors):
         metadata: Dict = {**(doc.metadata or {})}
         metadata.setdefault("source", metadata.get("source", "unknown"))
         metadata.setdefault("chunk", metadata.get("chunk", 0))
         items.append({
             "id": vector_id,
-            "values": vector,
+            "values": vector.tolist(),
             "metadata": metadata
         })
 
-    # Upsert depending on client flavor
-    if _PINECONE_V3:
-        index.upsert(vectors=items, namespace=namespace)
+    # Same upsert signature in the modern and legacy clients
+    if batcher is not None:
+        batcher.upsert(index, items, namespace=namespace)
     else:
-        index.upsert(vectors=items, namespace=namespace)  # same signature in older client
+        index.upsert(vectors=items, namespace=namespace)
+
+    chunk_store.append_many(zip(ids, texts))
+    first_metadata = documents[0].metadata or {}
+    _save_embedding_cache(ids, vectors, str(first_metadata.get("source", "unknown")),
+                          int(first_metadata.get("chunk", 0)))
 
     return len(items), getattr(index, "_name", os.environ.get("PINECONE_INDEX_NAME") or "")
 
@@ -141,13 +342,61 @@ def process_and_index(file_path: str,
                       namespace: Optional[str] = None,
                       chunk_size: int = 800,
                       chunk_overlap: int = 120,
-                      model: str = "mxbai-embed-large") -> Tuple[int, str]:
+                      model: str = "mxbai-embed-large",
+                      dimensions: Optional[int] = None,
+                      batcher: Optional[UpsertBatcher] = None) -> Tuple[int, str]:
     """
     High-level helper that:
     1) Loads and splits a document
-    2) Generates embeddings with Ollama mxbai-embed-large
-    3) Upserts vectors into Pinecone
+    2) Drops near-duplicate chunks (when INGEST_DEDUP is enabled)
+    3) Generates embeddings with Ollama mxbai-embed-large
+    4) Upserts vectors into Pinecone, UPSERT_BATCH_SIZE chunks at a time (or through
+       a shared `batcher` when several files are indexed concurrently)
     Returns (num_vectors_upserted, index_name_used)
     """
-    docs = load_and_split(file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
-    return upsert_documents_to_pinecone(docs, index_name=index_name, namespace=namespace, model=model)
+    total = 0
+    dropped = 0
+    index_used = index_name or os.environ.get("PINECONE_INDEX_NAME") or ""
+    if INGEST_DEDUP:
+        from utils.dedup import chunk_deduplicator, dedup_scope
+
+        # Duplicates are only looked up among chunks indexed into the same target
+        scope = dedup_scope(index_used, namespace, model, resolve_embedding_dimensions(dimensions))
+        # The index may have been recreated under the same name since chunks were recorded
+        index = _get_pinecone_index(index_name)
+
+        def exists(ids: List[str]) -> Set[str]:
+            return _indexed_ids(index, ids, namespace)
+
+    def flush(batch: List["Document"]) -> Tuple[int, int, str]:
+        if not INGEST_DEDUP:
+            count, used = upsert_documents_to_pinecone(batch, index_name=index_name, namespace=namespace,
+                                                       model=model, dimensions=dimensions, batcher=batcher)
+            return count, 0, used
+
+        kept, duplicates = chunk_deduplicator.filter(batch, [_hash_text(doc.page_content) for doc in batch], scope,
+                                                     exists=exists)
+        count, used = 0, index_used
+        if kept:
+            count, used = upsert_documents_to_pinecone([doc for _, doc, _, _ in kept], index_name=index_name,
+                                                       namespace=namespace, model=model, dimensions=dimensions,
+                                                       batcher=batcher)
+        chunk_deduplicator.commit(kept, duplicates, scope)
+        return count, len(duplicates), used
+
+    batch: List["Document"] = []
+    for doc in iter_chunks(file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap):
+        batch.append(doc)
+        if len(batch) >= UPSERT_BATCH_SIZE:
+            count, skipped, index_used = flush(batch)
+            total += count
+            dropped += skipped
+            batch = []
+    if batch:
+        count, skipped, index_used = flush(batch)
+        total += count
+        dropped += skipped
+
+    if dropped:
+        logger.info(f"Skipped {dropped} near-duplicate chunk(s) in {os.path.basename(file_path)}")
+    return total, index_used
@@ -0,0 +1,119 @@
+import os
+from typing import Optional, Sequence
+
+import numpy as np
+
+SUPPORTED_DTYPES = ("float32", "float16", "int8")
+
+
+def resolve_embedding_dimensions(dimensions: Optional[int] = None) -> Optional[int]:
+    """Return the requested truncation size, falling back to EMBEDDING_DIMENSIONS."""
+    if dimensions:
+        return dimensions
+    env_value = os.getenv("EMBEDDING_DIMENSIONS")
+    return int(env_value) if env_value else None
+
+
+def truncate_embeddings(vectors: np.ndarray, dimensions: Optional[int] = None) -> np.ndarray:
+    """
+    Matryoshka-style truncation: keep the leading `dimensions` components and
+    re-normalize each row to unit length so cosine / dot-product scores stay comparable.
+    Returns the input unchanged when no truncation is requested.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if not dimensions or dimensions >= vectors.shape[-1]:
+        return vectors
+    if dimensions < 1:
+        raise ValueError(f"Embedding dimensions must be positive, got {dimensions}")
+
+    truncated = np.ascontiguousarray(vectors[..., :dimensions])
+    norms = np.linalg.norm(truncated, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return truncated / norms
+
+
+class CompressedEmbeddings:
+    """
+    A block of embeddings stored as float32, float16 or int8.
+
+    int8 uses symmetric per-vector scalar quantization: each row keeps one float32
+    scale so that `values * scale` approximates the original vector.
+    """
+
+    def __init__(self, values: np.ndarray, scales: Optional[np.ndarray] = None,
+                 ids: Optional[Sequence[str]] = None):
+        self.values = values
+        self.scales = scales
+        self.ids = list(ids) if ids is not None else None
+
+    @property
+    def dtype(self) -> str:
+        return str(self.values.dtype)
+
+    @property
+    def dimensions(self) -> int:
+        return int(self.values.shape[-1])
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the vector payload (values plus scale factors)."""
+        return int(self.values.nbytes + (self.scales.nbytes if self.scales is not None else 0))
+
+    def __len__(self) -> int:
+        return int(self.values.shape[0])
+
+    def to_float32(self) -> np.ndarray:
+        """Reconstruct (approximate) float32 vectors."""
+        if self.scales is not None:
+            return self.values.astype(np.float32) * self.scales[:, None]
+        return self.values.astype(np.float32)
+
+    def save(self, path: str) -> None:
+        """Persist to a compressed .npz file."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        arrays = {"values": self.values}
+        if self.scales is not None:
+            arrays["scales"] = self.scales
+        if self.ids is not None:
+            arrays["ids"] = np.asarray(self.ids, dtype=str)
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> "CompressedEmbeddings":
+        """Load embeddings previously written with `save`."""
+        with np.load(path, allow_pickle=False) as data:
+            scales = data["scales"] if "scales" in data.files else None
+            ids = data["ids"].tolist() if "ids" in data.files else None
+            return cls(values=data["values"], scales=scales, ids=ids)
+
+
+def compress_embeddings(vectors: np.ndarray,
+                        dtype: str = "float32",
+                        dimensions: Optional[int] = None,
+                        ids: Optional[Sequence[str]] = None) -> CompressedEmbeddings:
+    """
+    Truncate (optional) and quantize a matrix of embeddings.
+
+    Args:
+        vectors: Array of shape (n, d)
+        dtype: One of "float32", "float16" or "int8"
+        dimensions: Optional Matryoshka truncation size
+        ids: Optional vector ids stored alongside the values
+
+    Returns:
+        CompressedEmbeddings
+    """
+    if dtype not in SUPPORTED_DTYPES:
+        raise ValueError(f"Unsupported embedding dtype: {dtype}. Supported: {', '.join(SUPPORTED_DTYPES)}")
+
+    vectors = truncate_embeddings(np.atleast_2d(np.asarray(vectors, dtype=np.float32)), dimensions)
+
+    if dtype == "float16":
+        return CompressedEmbeddings(values=vectors.astype(np.float16), ids=ids)
+    if dtype == "int8":
+        max_abs = np.abs(vectors).max(axis=1)
+        scales = (max_abs / 127.0).astype(np.float32)
+        scales[scales == 0] = 1.0
+        quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return CompressedEmbeddings(values=quantized, scales=scales, ids=ids)
+    return CompressedEmbeddings(values=vectors, ids=ids)
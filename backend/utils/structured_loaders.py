@@ -0,0 +1,312 @@
+import csv
+import io
+import json
+import os
+from typing import Any, Iterator, List, Optional, Tuple
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+JSON_LINES_EXTENSIONS = (".jsonl", ".ndjson")
+STRUCTURED_EXTENSIONS = (".csv", ".json") + JSON_LINES_EXTENSIONS
+
+_READ_SIZE = 64 * 1024
+_JSON_LINES_PEEK = 1024 * 1024  # Longest first line considered when detecting JSON Lines
+
+
+class RowChunkLoader(BaseLoader):
+    """
+    Base loader for row-oriented files that streams rows and groups them into
+    chunks on row boundaries, repeating an optional header line in every chunk.
+
+    Documents are already sized to `chunk_size` characters, so callers should not
+    split them again. Rows that do not fit in `chunk_size` on their own are split
+    with a recursive character splitter, each piece repeating the header.
+    Up to `chunk_overlap` characters of trailing rows are repeated at the start of
+    the next chunk.
+    """
+
+    pre_chunked = True
+
+    def __init__(self, file_path: str, chunk_size: int = 800, chunk_overlap: int = 120,
+                 encoding: str = "utf-8"):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.encoding = encoding
+
+    def _iter_rows(self) -> Iterator[Tuple[Optional[str], str]]:
+        """Yield (header, row_text) pairs; the header may change between rows"""
+        raise NotImplementedError
+
+    def _make_document(self, header: Optional[str], rows: List[Tuple[int, str]], chunk: int) -> Document:
+        lines = [text for _, text in rows]
+        if header:
+            lines.insert(0, header)
+        return Document(
+            page_content="\n".join(lines),
+            metadata={
+                "source": self.file_path,
+                "chunk": chunk,
+                "row_start": rows[0][0],
+                "row_end": rows[-1][0],
+            }
+        )
+
+    def _split_row(self, text: str, header_length: int) -> List[str]:
+        """Split an oversized row so each piece fits in a chunk next to the header"""
+        from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+        piece_size = max(self.chunk_size - header_length - 1, self.chunk_size // 4)
+        splitter = RecursiveCharacterTextSplitter(
+            chunk_size=piece_size,
+            chunk_overlap=min(self.chunk_overlap, piece_size // 2)
+        )
+        return splitter.split_text(text)
+
+    def lazy_load(self) -> Iterator[Document]:
+        chunk = 0
+        current_header: Optional[str] = None
+        rows: List[Tuple[int, str]] = []
+        length = 0
+        fresh_rows = False  # Whether `rows` holds anything beyond carried-over overlap
+
+        for row_number, (header, text) in enumerate(self._iter_rows(), start=1):
+            header_length = len(header) + 1 if header else 0
+            if header != current_header and rows:
+                if fresh_rows:
+                    yield self._make_document(current_header, rows, chunk)
+                    chunk += 1
+                rows, length, fresh_rows = [], 0, False
+            current_header = header
+
+            if header_length + len(text) + 1 > self.chunk_size:
+                # A row that does not fit on its own is split, repeating the header
+                if fresh_rows:
+                    yield self._make_document(current_header, rows, chunk)
+                    chunk += 1
+                for piece in self._split_row(text, header_length):
+                    yield self._make_document(current_header, [(row_number, piece)], chunk)
+                    chunk += 1
+                rows, length, fresh_rows = [], 0, False
+                continue
+
+            if fresh_rows and header_length + length + len(text) + 1 > self.chunk_size:
+                yield self._make_document(current_header, rows, chunk)
+                chunk += 1
+                # Carry trailing rows into the next chunk as overlap
+                carried: List[Tuple[int, str]] = []
+                carried_length = 0
+                for row in reversed(rows):
+                    if carried_length + len(row[1]) + 1 > self.chunk_overlap:
+                        break
+                    carried.insert(0, row)
+                    carried_length += len(row[1]) + 1
+                rows, length, fresh_rows = carried, carried_length, False
+
+            rows.append((row_number, text))
+            length += len(text) + 1
+            fresh_rows = True
+
+        if fresh_rows:
+            yield self._make_document(current_header, rows, chunk)
+
+
+class CSVRowLoader(RowChunkLoader):
+    """Stream a CSV file row by row; the first row is treated as the header"""
+
+    def _iter_rows(self) -> Iterator[Tuple[Optional[str], str]]:
+        with open(self.file_path, newline="", encoding=self.encoding, errors="replace") as handle:
+            reader = csv.reader(handle)
+            header_row = next(reader, None)
+            if header_row is None:
+                return
+            header = _format_csv_row(header_row)
+            for row in reader:
+                if not any(cell.strip() for cell in row):
+                    continue
+                yield header, _format_csv_row(row)
+
+
+class JSONRecordLoader(RowChunkLoader):
+    """
+    Stream records from JSON Lines files or JSON documents.
+
+    - JSON Lines (.jsonl / .ndjson, or a .json file with one object per line):
+      one record per line.
+    - A top-level JSON array: elements are decoded incrementally.
+    - A top-level JSON object: the elements of each list-valued member are streamed
+      as records (e.g. {"data": [...]}); other members are dropped. An object without
+      list members is a single record.
+    - Any other JSON value is a single record.
+
+    Records are rendered as compact JSON, one per line; field names are inline so
+    no header line is used.
+    """
+
+    def _iter_rows(self) -> Iterator[Tuple[Optional[str], str]]:
+        for record in self._iter_records():
+            yield None, json.dumps(record, ensure_ascii=False, separators=(", ", ": "))
+
+    def _iter_records(self) -> Iterator[Any]:
+        with open(self.file_path, encoding=self.encoding) as handle:
+            first = _peek_non_whitespace(handle)
+            if not first:
+                return
+            if self.file_path.lower().endswith(JSON_LINES_EXTENSIONS):
+                yield from _iter_json_lines(handle)
+            elif first == "[":
+                stream = _JSONStream(handle)
+                yield from stream.iter_array()
+                stream.expect_end()
+            elif first == "{" and _is_json_lines(handle):
+                yield from _iter_json_lines(handle)
+            elif first == "{":
+                stream = _JSONStream(handle)
+                yield from stream.iter_object_records()
+                stream.expect_end()
+            else:
+                yield json.load(handle)
+
+
+def _format_csv_row(row: List[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(row)
+    return buffer.getvalue()
+
+
+def _peek_non_whitespace(handle) -> str:
+    """Return the first non-whitespace character and rewind the handle"""
+    while True:
+        position = handle.tell()
+        char = handle.read(1)
+        if not char or not char.isspace():
+            handle.seek(position)
+            return char
+
+
+def _is_json_lines(handle) -> bool:
+    """A '{' file is JSON Lines if its first line is a complete JSON value followed by more data"""
+    position = handle.tell()
+    try:
+        json.loads(handle.readline(_JSON_LINES_PEEK))
+        return bool(handle.read(_READ_SIZE).strip())
+    except json.JSONDecodeError:
+        return False
+    finally:
+        handle.seek(position)
+
+
+def _iter_json_lines(handle) -> Iterator[Any]:
+    for line_number, line in enumerate(handle, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}") from e
+
+
+class _JSONStream:
+    """
+    Incremental reader for the outer structure of a JSON document.
+    Only container punctuation is parsed here; each element is decoded with
+    json.JSONDecoder.raw_decode, so memory is bounded by the largest element.
+    """
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        data = self.handle.read(_READ_SIZE)
+        self.buffer, self.position, self.eof = self.buffer[self.position:] + data, 0, not data
+        return bool(data)
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at end of input)"""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if self.eof or not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        char = self.peek()
+        if not char or char not in chars:
+            found = repr(char) if char else "end of input"
+            raise ValueError(f"Invalid JSON: expected {' or '.join(repr(c) for c in chars)}, found {found}")
+        self.position += 1
+        return char
+
+    def expect_end(self):
+        if self.peek():
+            raise ValueError("Invalid JSON: extra data after the top-level value")
+
+    def decode_value(self) -> Any:
+        if not self.peek():
+            raise ValueError("Invalid JSON: unexpected end of input")
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A value touching the end of the buffer (e.g. a number) may be incomplete
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise ValueError(f"Invalid JSON: {e.msg}") from e
+            self._fill()
+
+    def iter_array(self) -> Iterator[Any]:
+        """Decode the elements of the array starting at the current position"""
+        self.expect("[")
+        if self.peek() == "]":
+            self.position += 1
+            return
+        while True:
+            yield self.decode_value()
+            if self.expect(",]") == "]":
+                return
+
+    def iter_object_records(self) -> Iterator[Any]:
+        """Stream the elements of the list members of the object at the current position"""
+        self.expect("{")
+        found_list = False
+        others = {}
+        if self.peek() == "}":
+            self.position += 1
+        else:
+            while True:
+                key = self.decode_value()
+                if not isinstance(key, str):
+                    raise ValueError("Invalid JSON: object keys must be strings")
+                self.expect(":")
+                if self.peek() == "[":
+                    found_list = True
+                    others.clear()
+                    yield from self.iter_array()
+                else:
+                    value = self.decode_value()
+                    if not found_list:
+                        others[key] = value
+                if self.expect(",}") == "}":
+                    break
+        if not found_list:
+            yield others
+
+
+def load_structured_loader(file_path: str, chunk_size: int = 800, chunk_overlap: int = 120) -> RowChunkLoader:
+    """Return a streaming row loader for a CSV / JSON / JSON Lines file"""
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        return CSVRowLoader(file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    if extension in STRUCTURED_EXTENSIONS:
+        return JSONRecordLoader(file_path, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    raise ValueError(f"Unsupported file type: {file_path}")